@@ -0,0 +1,119 @@
+"""
+Request-coalescing batch loader (DataLoader pattern)
+- `load(key)` from any thread joins the batch collecting during the current `window`;
+  the batch is sent as one call to `batch_fn(keys) -> {key: value}` and each caller
+  gets its own value back (missing keys -> None).
+- Identical keys within a window share one slot.
+- If `batch_fn` raises, every caller in that batch gets the exception.
+- The batch runs in the context (contextvars: trace span, request timings) of the caller
+  that opened it, so its upstream calls show up under that request instead of as orphans.
+- `SingleFlight` is the unbatched form: concurrent identical calls share one in-flight result.
+"""
+
+import functools
+import threading
+import contextvars
+from concurrent.futures import Future
+
+from metrics import Histogram
+from upstream import conditional
+
+LOADER_BATCH_SIZE = Histogram("loader_batch_size", "Keys per batched upstream call.", ["loader"],
+                              buckets=(1, 2, 5, 10, 20, 50, 100))
+
+
+class BatchLoader:
+    def __init__(self, name, batch_fn, window=0.01, max_batch=50):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = {}   # key -> Future, for the batch being collected
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def load(self, key, timeout=None):
+        ready = None
+        with self._lock:
+            fut = self._pending.get(key)
+            if fut is None:
+                fut = self._pending[key] = Future()
+                if len(self._pending) >= self.max_batch:
+                    ready = self._take()
+                elif self._timer is None:
+                    self._timer = threading.Timer(self.window, contextvars.copy_context().run, args=(self._flush,))
+                    self._timer.daemon = True
+                    self._timer.start()
+        if ready:
+            self._dispatch(ready)
+        return fut.result(timeout=timeout)
+
+    def _take(self):
+        batch, self._pending = self._pending, {}
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        LOADER_BATCH_SIZE.observe(len(batch), loader=self.name)
+        try:
+            # a batch answers many keys, so it never revalidates against one caller's cached validators
+            with conditional(None):
+                results = self.batch_fn(list(batch))
+        except Exception as e:
+            for fut in batch.values():
+                fut.set_exception(e)
+            return
+        for key, fut in batch.items():
+            fut.set_result(results.get(key))
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution; later callers wait for the first."""
+
+    def __init__(self):
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            fut = self._in_flight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._in_flight[key] = Future()
+        if not leader:
+            return fut.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def shared(self, fn):
+        """Decorator: coalesce concurrent calls to `fn` with equal arguments (dict arguments included)."""
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (fn.__name__, _freeze(args), _freeze(kwargs))
+            return self.do(key, fn, *args, **kwargs)
+        return wrapper
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
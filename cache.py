@@ -0,0 +1,111 @@
+"""
+In-process lookup cache for upstream source data
+- Fresh entries are served directly until `ttl`.
+- Past `ttl` but within `stale_ttl`, the stale value is served immediately and a
+  single background refresh is started (stale-while-revalidate).
+- "No match" results (as decided by `is_negative`) are cached for the shorter
+  `negative_ttl` and never served stale.
+- Fetch errors are not cached; a failed background refresh keeps the stale value.
+- Positive entries keep the ETag / Last-Modified of the response they came from; a
+  refresh revalidates with them, and a 304 just renews the existing value.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+from metrics import CACHE_LOOKUPS, timed
+from upstream import conditional, NotModified
+
+
+def _is_empty(value):
+    return not value
+
+
+class LookupCache:
+    def __init__(self, name, ttl=6 * 3600, negative_ttl=15 * 60, stale_ttl=7 * 24 * 3600, max_entries=20000):
+        self.name = name
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, fresh_until, stale_until, negative, validators)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_fetch(self, key, fetch, is_negative=_is_empty):
+        with timed(f"cache.{self.name}"):
+            now = time.time()
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+            if entry is not None:
+                value, fresh_until, stale_until, negative, _ = entry
+                if now < fresh_until:
+                    CACHE_LOOKUPS.inc(cache=self.name, result="negative_hit" if negative else "hit")
+                    return value
+                if now < stale_until:
+                    CACHE_LOOKUPS.inc(cache=self.name, result="stale")
+                    self._refresh_in_background(key, fetch, is_negative)
+                    return value
+            CACHE_LOOKUPS.inc(cache=self.name, result="miss")
+        return self._fetch_and_store(key, fetch, is_negative)
+
+    def peek(self, key):
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None and time.time() < entry[2] else None
+
+    def set(self, key, value, negative=False, validators=None):
+        now = time.time()
+        if negative:
+            entry = (value, now + self.negative_ttl, now + self.negative_ttl, True, None)
+        else:
+            entry = (value, now + self.ttl, now + self.ttl + self.stale_ttl, False, validators or None)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _fetch_and_store(self, key, fetch, is_negative):
+        previous = self._entries.get(key)
+        validators = dict(previous[4]) if previous is not None and previous[4] else {}
+        try:
+            with conditional(validators):
+                value = fetch()
+        except NotModified:
+            CACHE_LOOKUPS.inc(cache=self.name, result="revalidated")
+            self.set(key, previous[0], validators=validators)
+            return previous[0]
+        negative = is_negative(value)
+        self.set(key, value, negative=negative, validators=None if negative else validators)
+        return value
+
+    def _refresh_in_background(self, key, fetch, is_negative):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._fetch_and_store(key, fetch, is_negative)
+            except Exception as e:
+                print(f"Background refresh failed for {self.name} {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f"refresh-{self.name}", daemon=True).start()
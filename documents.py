@@ -0,0 +1,59 @@
+"""
+Per-document state for incremental re-verification
+- Sentences are fingerprinted (hash of the whitespace-normalized text). A document keeps the
+  claims extracted for each fingerprint and the verdict of each claim under the film it was
+  checked against, so re-verifying an edited document only extracts and checks the new or
+  changed sentences.
+- Each update keeps only what the latest version of the document still uses.
+- At most `max_documents` documents are kept; the least recently used is dropped first.
+"""
+
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def fingerprint(sentence):
+    return hashlib.blake2b(re.sub(r"\s+", " ", sentence).strip().encode("utf-8"), digest_size=16).hexdigest()
+
+
+class DocumentState:
+    def __init__(self):
+        self.claims = {}     # sentence fingerprint -> claims extracted from it
+        self.verdicts = {}   # (film key, year hint, attribute, value) -> verification result
+        self.lock = threading.Lock()
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.claims), dict(self.verdicts)
+
+    def replace(self, claims, verdicts):
+        with self.lock:
+            self.claims, self.verdicts = claims, verdicts
+
+
+class DocumentStore:
+    def __init__(self, max_documents=1000):
+        self.max_documents = max_documents
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def get(self, document_id):
+        """The document's state, created empty on first use."""
+        with self._lock:
+            state = self._documents.get(document_id)
+            if state is None:
+                state = self._documents[document_id] = DocumentState()
+                while len(self._documents) > self.max_documents:
+                    self._documents.popitem(last=False)
+            else:
+                self._documents.move_to_end(document_id)
+            return state
+
+    def drop(self, document_id):
+        with self._lock:
+            self._documents.pop(document_id, None)
@@ -0,0 +1,206 @@
+"""
+Local CPU claim extraction (no LLM)
+- Same output as server.extract_claims: a list of {"attribute", "value"} claims.
+- spaCy dependency parse + NER (en_core_web_sm by default, override with LOCAL_EXTRACTOR_MODEL)
+  mapped to claim attributes with rules: PERSON entities under "directed"/"director" become
+  directors, under "starred"/"played"/... actors; DATE years near "released" become release_year;
+  MONEY near "grossed" box_office; plus patterns for awards, runtime, rating, genre and franchise.
+- `extract_claims_batch` runs many sentences through `nlp.pipe` (batched, optional n_process).
+
+Requires spaCy and a model:
+    pip install spacy && python -m spacy download en_core_web_sm
+
+Benchmark against the Gemini path (sentences/sec):
+    python local_extractor.py bench --file sentences.txt --n 5000 --gemini 20
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import threading
+
+DEFAULT_MODEL = os.environ.get("LOCAL_EXTRACTOR_MODEL", "en_core_web_sm")
+BATCH_SIZE = 64
+
+DIRECTOR_LEMMAS = {"direct", "director", "helm", "filmmaker"}
+ACTOR_LEMMAS = {"star", "act", "actor", "actress", "play", "appear", "feature", "cast", "portray", "starring"}
+RELEASE_LEMMAS = {"release", "premiere", "come", "debut", "open"}
+GROSS_LEMMAS = {"gross", "earn", "make", "box", "revenue", "collect", "take"}
+PRODUCTION_LEMMAS = {"produce", "distribute", "production", "studio", "finance"}
+GENRES = ("science fiction", "sci-fi", "action", "adventure", "animation", "animated", "comedy", "crime",
+          "documentary", "drama", "family", "fantasy", "history", "horror", "musical", "mystery",
+          "romance", "romantic", "thriller", "war", "western", "superhero", "biographical")
+
+AWARD_RE = re.compile(r"\b(?:won|wins|received|earned|took home|was awarded)\s+(?:an?|the|\d+|several|multiple)?\s*"
+                      r"((?:Academy Awards?|Oscars?|Golden Globes?|BAFTAs?|Palme d'Or)(?:\s+for\s+Best\s+[A-Z][\w ]*?)?)(?=[,.;]|\s+(?:in|for|and)\b|$)")
+RUNTIME_RE = re.compile(r"\b(?:(\d)\s*hours?(?:\s*(?:and\s*)?(\d{1,2})\s*min(?:ute)?s?)?|(\d{2,3})\s*min(?:ute)?s?)\b", re.I)
+RATING_RE = re.compile(r"\b(?:rating|rated|score[sd]?|IMDb)\D{0,15}?(\d{1,2}(?:\.\d)?)(?:\s*/\s*10|\s+out of 10)?", re.I)
+FRANCHISE_RE = re.compile(r"\b(?:part of|installment in|entry in|film in)\s+the\s+([A-Z][\w:' ]+?)\s+(?:franchise|series|saga|trilogy|universe)", re.I)
+QUOTED_RE = re.compile(r"[\"“']([^\"”']{2,80})[\"”']")
+YEAR_RE = re.compile(r"\b(19\d{2}|20\d{2})\b")
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+
+def load_pipeline(model=DEFAULT_MODEL):
+    global _nlp
+    with _nlp_lock:
+        if _nlp is None:
+            import spacy
+            _nlp = spacy.load(model)
+        return _nlp
+
+
+def _context_lemmas(token, depth=3):
+    """Lemmas of the token, its ancestors (up to `depth`) and their direct children."""
+    lemmas = {token.lemma_.lower()}
+    for i, anc in enumerate(token.ancestors):
+        if i >= depth:
+            break
+        lemmas.add(anc.lemma_.lower())
+        lemmas.update(c.lemma_.lower() for c in anc.children if c.dep_ in ("compound", "amod", "prep", "agent"))
+    lemmas.update(c.lemma_.lower() for c in token.children if c.dep_ in ("compound", "appos", "amod"))
+    if token.i > 0:
+        lemmas.add(token.doc[token.i - 1].lemma_.lower())
+    return lemmas
+
+
+def _title_candidates(doc, people):
+    for ent in doc.ents:
+        if ent.label_ == "WORK_OF_ART":
+            yield ent.text
+    for m in QUOTED_RE.finditer(doc.text):
+        yield m.group(1)
+    for tok in doc:
+        # "<Title> was directed by ...", "<Title> is a 2010 film ..."
+        if tok.dep_ in ("nsubj", "nsubjpass") and tok.pos_ == "PROPN" and tok.i not in people:
+            head = tok.head.lemma_.lower()
+            if head in DIRECTOR_LEMMAS | RELEASE_LEMMAS | GROSS_LEMMAS | {"be", "star", "feature", "win"}:
+                span = doc[tok.left_edge.i:tok.i + 1]
+                if not any(t.ent_type_ == "PERSON" for t in span):
+                    yield span.text
+
+
+def claims_from_doc(doc):
+    claims = []
+
+    def add(attribute, value):
+        value = str(value).strip().strip(".,;")
+        if value and {"attribute": attribute, "value": value} not in claims:
+            claims.append({"attribute": attribute, "value": value})
+
+    text = doc.text
+    people = {t.i for ent in doc.ents if ent.label_ == "PERSON" for t in ent}
+    titles = list(dict.fromkeys(_title_candidates(doc, people)))
+    if titles:
+        add("title", titles[0])
+
+    award_spans = [m.span() for m in AWARD_RE.finditer(text)]
+    for m in AWARD_RE.finditer(text):
+        add("award", m.group(1))
+
+    for ent in doc.ents:
+        in_award = any(a <= ent.start_char < b for a, b in award_spans)
+        context = _context_lemmas(ent.root)
+        if ent.label_ == "PERSON":
+            if context & DIRECTOR_LEMMAS:
+                add("director", ent.text)
+            elif context & ACTOR_LEMMAS:
+                add("actor", ent.text)
+        elif ent.label_ == "DATE" and not in_award:
+            year = YEAR_RE.search(ent.text)
+            if year and (context & RELEASE_LEMMAS or titles):
+                add("release_year", year.group(1))
+        elif ent.label_ == "MONEY" and (context & GROSS_LEMMAS or "box office" in text.lower()):
+            add("box_office", ent.text)
+        elif ent.label_ == "LANGUAGE":
+            add("language", ent.text)
+        elif ent.label_ == "ORG" and context & PRODUCTION_LEMMAS:
+            add("production_company", ent.text)
+        elif ent.label_ == "GPE" and context & (PRODUCTION_LEMMAS | {"shoot", "film", "make"}):
+            add("country", ent.text)
+
+    m = RUNTIME_RE.search(text)
+    if m:
+        minutes = int(m.group(3)) if m.group(3) else int(m.group(1)) * 60 + int(m.group(2) or 0)
+        add("runtime", minutes)
+    m = RATING_RE.search(text)
+    if m and float(m.group(1)) <= 10:
+        add("rating", m.group(1))
+    lowered = text.lower()
+    for genre in GENRES:
+        if re.search(rf"\b{re.escape(genre)}\b", lowered):
+            add("genre", genre)
+    m = FRANCHISE_RE.search(text)
+    if m:
+        add("franchise_info", m.group(1))
+    return claims
+
+
+def extract_claims_batch(sentences, batch_size=BATCH_SIZE, n_process=1):
+    nlp = load_pipeline()
+    return [claims_from_doc(doc) for doc in nlp.pipe(sentences, batch_size=batch_size, n_process=n_process)]
+
+
+def extract_claims_local(sentence):
+    """Drop-in for server.extract_claims."""
+    return extract_claims_batch([sentence])[0]
+
+
+# ---------------------------
+# Benchmark
+# ---------------------------
+SAMPLE_SENTENCES = [
+    "Inception is a 2010 science fiction film directed by Christopher Nolan and starring Leonardo DiCaprio.",
+    "Avengers: Endgame grossed $2.79 billion worldwide and runs 181 minutes.",
+    "The Revenant was released in 2015; Leonardo DiCaprio won the Oscar for Best Actor for it.",
+    "Parasite, directed by Bong Joon-ho, was produced by Barunson E&A and is in Korean.",
+    "The Dark Knight has an IMDb rating of 9.0 and is part of the The Dark Knight trilogy.",
+]
+
+
+def _rate(fn, sentences):
+    start = time.perf_counter()
+    fn(sentences)
+    return len(sentences) / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local claim extraction.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("extract", help="print claims for each sentence")
+    ex.add_argument("sentences", nargs="+")
+    bench = sub.add_parser("bench", help="throughput in sentences/sec")
+    bench.add_argument("--file", help="one sentence per line (default: built-in samples)")
+    bench.add_argument("--n", type=int, default=2000, help="sentences to process locally")
+    bench.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    bench.add_argument("--n-process", type=int, default=1)
+    bench.add_argument("--gemini", type=int, default=0, help="also time this many sentences through server.extract_claims")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "extract":
+        for sentence, claims in zip(args.sentences, extract_claims_batch(args.sentences)):
+            print(sentence, "->", claims)
+        return 0
+
+    pool = SAMPLE_SENTENCES
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            pool = [l.strip() for l in f if l.strip()]
+    sentences = (pool * (args.n // len(pool) + 1))[:args.n]
+    load_pipeline()
+    single = _rate(lambda ss: [extract_claims_local(s) for s in ss], sentences[:min(len(sentences), 500)])
+    batched = _rate(lambda ss: extract_claims_batch(ss, args.batch_size, args.n_process), sentences)
+    print(f"local, one at a time: {single:8.1f} sentences/sec")
+    print(f"local, nlp.pipe (batch {args.batch_size}, n_process {args.n_process}): {batched:8.1f} sentences/sec")
+    if args.gemini:
+        from server import extract_claims
+        print(f"gemini (server.extract_claims): {_rate(lambda ss: [extract_claims(s) for s in ss], sentences[:args.gemini]):8.2f} sentences/sec")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+In-process metrics for the verifier service
+- Counters and histograms rendered in the Prometheus text format (served on /metrics).
+- `timed(stage)` records stage latency/errors and, when a request has called
+  `start_timings()`, also accumulates per-stage milliseconds for the JSON response.
+- No external dependency: the exposition format is small enough to render by hand.
+"""
+
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Seconds. Covers fast cache hits up to slow SPARQL / Gemini calls.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_registry = []
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(n, "")) for n in labelnames)
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join('%s="%s"' % (n, str(v).replace("\\", "\\\\").replace('"', '\\"')) for n, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        with _lock:
+            _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with _lock:
+            items = sorted(self._values.items())
+        for key, v in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {v}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # key -> [bucket_counts, sum, count]
+        with _lock:
+            _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with _lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels):
+        series = self._series.get(_label_key(self.labelnames, labels))
+        return series[2] if series else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            items = sorted((k, (list(s[0]), s[1], s[2])) for k, s in self._series.items())
+        for key, (buckets, total, count) in items:
+            for bound, n in zip(self.buckets, buckets):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', bound))} {n}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+def render_prometheus():
+    with _lock:
+        metrics = list(_registry)
+    lines = []
+    for m in metrics:
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------
+# Metric definitions
+# ---------------------------
+STAGE_LATENCY = Histogram("verifier_stage_seconds", "Latency of pipeline stages (extraction, source fetches, verification).", ["stage"])
+STAGE_ERRORS = Counter("verifier_stage_errors_total", "Pipeline stages that raised.", ["stage"])
+
+UPSTREAM_LATENCY = Histogram("upstream_request_seconds", "Latency of individual HTTP attempts to upstream sources.", ["source"])
+UPSTREAM_REQUESTS = Counter("upstream_requests_total", "HTTP responses from upstream sources by status code.", ["source", "status"])
+UPSTREAM_ERRORS = Counter("upstream_errors_total", "Failed HTTP attempts (network errors and non-2xx).", ["source"])
+UPSTREAM_RETRIES = Counter("upstream_retries_total", "Retries issued after a failed attempt.", ["source"])
+UPSTREAM_RATE_LIMITED = Counter("upstream_rate_limited_total", "HTTP 429 responses from upstream sources.", ["source"])
+CIRCUIT_TRIPS = Counter("upstream_circuit_trips_total", "Times a source circuit breaker opened.", ["source"])
+CIRCUIT_REJECTED = Counter("upstream_circuit_rejected_total", "Requests short-circuited while a breaker was open.", ["source"])
+HEDGED_REQUESTS = Counter("upstream_hedged_requests_total", "Hedged duplicate requests sent, and how many of them answered first.", ["source", "result"])
+CONDITIONAL_REQUESTS = Counter("upstream_conditional_requests_total", "Revalidation requests by outcome (200 modified vs 304 not_modified).", ["source", "result"])
+
+CLAIM_PARSE = Counter("claim_extraction_parse_total", "LLM claim-extraction responses by mode (prose/schema) and parse result (ok, repaired, invalid_items, failed).", ["mode", "result"])
+
+OMDB_LOOKUP_PATH = Counter("omdb_lookup_path_total", "Which OMDb path served a title lookup (direct ?t=, search fallback, or miss).", ["path"])
+TITLE_DISAMBIGUATIONS = Counter("title_disambiguations_total", "Ambiguous TMDb title matches settled by claim agreement (kept the default pick or switched).", ["result"])
+INCREMENTAL_SENTENCES = Counter("incremental_sentences_total", "Sentences of re-verified documents whose claims were reused vs extracted.", ["result"])
+
+# Hit ratio = hits / (hits + misses), e.g. in PromQL:
+#   sum by (cache) (rate(cache_lookups_total{result="hit"}[5m])) / sum by (cache) (rate(cache_lookups_total[5m]))
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Lookup cache results.", ["cache", "result"])
+
+
+# ---------------------------
+# Per-request timings
+# ---------------------------
+_timings = contextvars.ContextVar("verifier_timings", default=None)
+
+
+def start_timings():
+    """Begin collecting stage timings for the current request; returns the dict that fills up."""
+    timings = {}
+    _timings.set(timings)
+    return timings
+
+
+def record_timing(stage, seconds):
+    timings = _timings.get()
+    if timings is not None:
+        with _lock:
+            timings[stage] = round(timings.get(stage, 0.0) + seconds * 1000.0, 2)
+
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        if getattr(e, "stage_error", True):
+            STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.observe(elapsed, stage=stage)
+        record_timing(stage, elapsed)
@@ -0,0 +1,160 @@
+"""
+Local Academy Award index (wins and nominations)
+- Built from one bulk Wikidata export (P166 award received / P1411 nominated for, where the
+  award is an Academy Award), stored as JSON lines and loaded into dicts keyed by person,
+  film and ceremony year, so Oscar claims need no per-claim SPARQL.
+- `start_auto_refresh` reloads the file in the background whenever it changes.
+
+Build / refresh the export (e.g. nightly from cron):
+    python oscar_index.py build --out oscars.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import defaultdict
+
+from rapidfuzz import fuzz
+
+from title_index import normalize_title
+
+FILM_MATCH_THR = 90
+
+EXPORT_QUERY = """
+SELECT ?person ?personLabel ?work ?workLabel ?award ?awardLabel ?time ?kind WHERE {
+  { ?person p:P166 ?st. ?st ps:P166 ?award. BIND("won" AS ?kind) }
+  UNION
+  { ?person p:P1411 ?st. ?st ps:P1411 ?award. BIND("nominated" AS ?kind) }
+  ?award wdt:P31 wd:Q19020.
+  ?person wdt:P31 wd:Q5.
+  OPTIONAL { ?st pq:P1686 ?work. }
+  OPTIONAL { ?st pq:P585 ?time. }
+  SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
+}
+"""
+
+
+class OscarIndex:
+    def __init__(self):
+        self._records = []
+        self._by_person = {}
+        self._by_film = {}
+        self._by_year = {}
+        self.loaded_at = None
+        self._mtime = None
+
+    def __len__(self):
+        return len(self._records)
+
+    def replace(self, records):
+        """Swap in a new record set (built off to the side, so readers never see a half-built index)."""
+        by_person, by_film, by_year = defaultdict(list), defaultdict(list), defaultdict(list)
+        for r in records:
+            by_person[normalize_title(r["person"])].append(r)
+            if r.get("person_qid"):
+                by_person[r["person_qid"]].append(r)
+            if r.get("film"):
+                by_film[normalize_title(r["film"])].append(r)
+            if r.get("year"):
+                by_year[r["year"]].append(r)
+        self._records, self._by_person, self._by_film, self._by_year = list(records), dict(by_person), dict(by_film), dict(by_year)
+        self.loaded_at = time.time()
+
+    def by_person(self, person):
+        return self._by_person.get(person if str(person).startswith("Q") and str(person)[1:].isdigit() else normalize_title(person), [])
+
+    def by_film(self, film):
+        return self._by_film.get(normalize_title(film), [])
+
+    def by_year(self, year):
+        return self._by_year.get(int(year), [])
+
+    def lookup(self, person, film=None, year=None, won=True):
+        records = self.by_person(person)
+        if won is not None:
+            records = [r for r in records if r["won"] == won]
+        if year:
+            records = [r for r in records if r.get("year") == int(year)]
+        if film:
+            film_norm = normalize_title(film)
+            records = [r for r in records if r.get("film") and fuzz.ratio(film_norm, normalize_title(r["film"])) >= FILM_MATCH_THR]
+        return records
+
+    def check_win(self, person, film=None, year=None):
+        """Same result shape as wikidata_check_oscar_win."""
+        if not self.by_person(person):
+            return {"supported": False, "evidence": [], "reason": f"No Academy Award record for '{person}' in the local index."}
+        wins = self.lookup(person, film, year, won=True)
+        if not wins:
+            return {"supported": False, "evidence": [], "reason": "No Academy Award win found in the local index for given filters."}
+        return {"supported": True, "evidence": [{"work": r.get("film"), "time": str(r["year"]) if r.get("year") else None,
+                                                 "award": r["category"]} for r in wins]}
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+    def load_jsonl(self, path):
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(l) for l in f if l.strip()]
+        self.replace(records)
+        self._mtime = os.path.getmtime(path)
+        return len(records)
+
+    def start_auto_refresh(self, path, interval=3600):
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    if os.path.getmtime(path) != self._mtime:
+                        print(f"Reloaded {self.load_jsonl(path)} Academy Award records from {path}")
+                except Exception as e:
+                    print("Oscar index refresh failed:", e)
+        threading.Thread(target=run, name="oscar-index-refresh", daemon=True).start()
+
+
+def records_from_bindings(bindings):
+    records = []
+    for b in bindings:
+        time_value = b.get("time", {}).get("value", "")
+        records.append({
+            "person_qid": b["person"]["value"].rsplit("/", 1)[-1],
+            "person": b.get("personLabel", {}).get("value", ""),
+            "film_qid": b["work"]["value"].rsplit("/", 1)[-1] if "work" in b else None,
+            "film": b.get("workLabel", {}).get("value"),
+            "category": b.get("awardLabel", {}).get("value", ""),
+            "year": int(time_value[:4]) if time_value[:4].isdigit() else None,
+            "won": b["kind"]["value"] == "won",
+        })
+    return records
+
+
+def build_from_wikidata(out_path):
+    from upstream import robust_get
+    resp = robust_get("https://query.wikidata.org/sparql", params={"query": EXPORT_QUERY, "format": "json"},
+                      headers={"User-Agent": "MovieFactChecker/1.0 (contact: you@example.com)"},
+                      timeout=300, source="wikidata", hedge=False)
+    records = records_from_bindings(resp.json().get("results", {}).get("bindings", []))
+    tmp = out_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(r) + "\n")
+    os.replace(tmp, out_path)
+    return len(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the local Academy Award index from Wikidata.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("--out", default="oscars.jsonl")
+    args = parser.parse_args(argv)
+    if args.cmd == "build":
+        print(f"Wrote {build_from_wikidata(args.out)} records to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
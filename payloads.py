@@ -0,0 +1,212 @@
+"""
+Decoding and field projection for large upstream payloads
+- `loads` uses orjson when it is installed (several times faster than the stdlib decoder
+  on big credit lists) and falls back to `json`.
+- `project_tmdb_movie` / `project_sparql_rows` keep only the fields verify_claims reads,
+  so cached records hold a few KB instead of the full cast/crew tree.
+- `record_version` hashes records' content, so anything keyed on it changes with the data.
+- `JsonArrayStream` pulls complete objects out of a JSON array that is still arriving
+  (streamed LLM output), ignoring any prose or code fences around it.
+
+Benchmark decode time and peak memory per film, raw vs projected (built-in synthetic
+payloads sized like a big release, or saved TMDb /movie/{id}?append_to_response=credits
+and SPARQL JSON responses):
+    python payloads.py bench --n 200 --tmdb movie.json --sparql rows.json
+"""
+
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tracemalloc
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def loads(content):
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+TMDB_MOVIE_FIELDS = ("id", "title", "original_title", "release_date", "imdb_id", "revenue", "runtime",
+                     "vote_average", "genres", "belongs_to_collection", "external_ids", "status_code", "status_message")
+
+
+def project_tmdb_movie(data):
+    """TMDb /movie/{id} (with credits appended) cut down to the fields the verifier consumes."""
+    out = {k: data[k] for k in TMDB_MOVIE_FIELDS if k in data}
+    if "genres" in out:
+        out["genres"] = [{"name": g.get("name")} for g in out["genres"]]
+    credits = data.get("credits")
+    if credits is not None:
+        out["credits"] = {
+            "cast": [{"name": c.get("name")} for c in credits.get("cast", [])],
+            "crew": [{"name": c.get("name"), "job": c.get("job")} for c in credits.get("crew", [])
+                     if c.get("job") == "Director"],
+        }
+    return out
+
+
+def project_sparql_rows(data):
+    """
+    SPARQL JSON results -> bindings keeping only each variable's "value". The OPTIONAL
+    cast x genre x award cross product repeats the same cells on every row, so identical
+    cells share one (read-only) dict.
+    """
+    cells = {}
+    def cell(c):
+        v = c["value"]
+        shared = cells.get(v)
+        if shared is None:
+            shared = cells[v] = {"value": v}
+        return shared
+    return [{var: cell(c) for var, c in row.items()} for row in data.get("results", {}).get("bindings", [])]
+
+
+def _canonical(value):
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def record_version(*records):
+    """Short content hash of one or more JSON-like records (key order does not matter)."""
+    h = hashlib.blake2b(digest_size=12)
+    for record in records:
+        h.update(_canonical(record))
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+
+class JsonArrayStream:
+    """Feed text chunks; `feed` returns the top-level array's objects completed so far."""
+
+    def __init__(self):
+        self._buf = []
+        self._depth = 0          # 0 = before the array, 1 = inside it, 2+ = inside an element
+        self._in_string = False
+        self._escape = False
+        self._done = False
+
+    def feed(self, chunk):
+        objects = []
+        for ch in chunk:
+            if self._done:
+                break
+            if self._depth == 0:
+                if ch == "[":
+                    self._depth = 1
+                continue
+            if self._depth >= 2:
+                self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 1:
+                    self._buf = [ch]
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    try:
+                        objects.append(loads("".join(self._buf)))
+                    except ValueError:
+                        pass         # malformed element: skip it, keep the rest of the stream
+                    self._buf = []
+                elif self._depth == 0:
+                    self._done = True
+        return objects
+
+
+# ---------------------------
+# Benchmark
+# ---------------------------
+def _sample_tmdb(cast=250, crew=900):
+    """A TMDb movie-with-credits payload the size of a big release (deterministic)."""
+    person = lambda i: {"adult": False, "gender": i % 3, "id": 100000 + i, "known_for_department": "Acting",
+                        "name": f"Person {i}", "original_name": f"Person {i}", "popularity": 1.5 + i % 40,
+                        "profile_path": f"/p{i:06d}.jpg", "credit_id": f"{i:024x}"}
+    jobs = ("Director", "Producer", "Editor", "Sound Designer", "Visual Effects Supervisor", "Stunts")
+    return {"id": 299534, "title": "Sample Film", "original_title": "Sample Film", "release_date": "2019-04-24",
+            "imdb_id": "tt4154796", "revenue": 2799439100, "runtime": 181, "vote_average": 8.2,
+            "overview": "x" * 600, "genres": [{"id": 12, "name": "Adventure"}, {"id": 878, "name": "Science Fiction"}],
+            "production_companies": [{"id": 420, "name": "Sample Studios", "logo_path": "/l.png", "origin_country": "US"}],
+            "credits": {"cast": [dict(person(i), character=f"Role {i}", cast_id=i, order=i) for i in range(cast)],
+                        "crew": [dict(person(cast + i), department="Crew", job=jobs[i % len(jobs)]) for i in range(crew)]}}
+
+
+def _sample_sparql(rows=200):
+    """A WIKIDATA_MOVIE_QUERY result: the cast x genre x award cross product of one film."""
+    uri = lambda q: {"type": "uri", "value": f"http://www.wikidata.org/entity/Q{q}"}
+    literal = lambda v: {"xml:lang": "en", "type": "literal", "value": v}
+    bindings = [{"item": uri(23572), "itemLabel": literal("Sample Film"), "directorLabel": literal("Sample Director"),
+                 "publicationDate": {"datatype": "http://www.w3.org/2001/XMLSchema#dateTime", "type": "literal",
+                                     "value": "2019-04-24T00:00:00Z"},
+                 "castLabel": literal(f"Person {i // 12}"), "genreLabel": literal(("action film", "science fiction film")[i % 2]),
+                 "awardLabel": literal(f"Award {i % 6}"), "countryLabel": literal("United States of America")}
+                for i in range(rows)]
+    return {"head": {"vars": sorted(bindings[0])}, "results": {"bindings": bindings}}
+
+
+def _best_ms(fn, content, n):
+    best = float("inf")
+    for _ in range(n):
+        start = time.perf_counter()
+        fn(content)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def _memory_kb(fn, content):
+    """(peak, retained) KB allocated while `fn(content)` runs / still held by its result."""
+    tracemalloc.start()
+    result = fn(content)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak / 1024.0, retained / 1024.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upstream payload decoding and projection.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    bench = sub.add_parser("bench", help="decode ms and peak/retained KB per film, raw vs projected")
+    bench.add_argument("--tmdb", nargs="*", default=[], help="saved /movie/{id}?append_to_response=credits JSON files")
+    bench.add_argument("--sparql", nargs="*", default=[], help="saved SPARQL JSON results files")
+    bench.add_argument("--n", type=int, default=200, help="timing repetitions per payload (best is reported)")
+    args = parser.parse_args(argv)
+
+    def read(path):
+        with open(path, "rb") as f:
+            return f.read()
+    payloads = [("tmdb " + p, read(p), project_tmdb_movie) for p in args.tmdb]
+    payloads += [("sparql " + p, read(p), project_sparql_rows) for p in args.sparql]
+    if not payloads:
+        payloads = [("tmdb (built-in sample)", json.dumps(_sample_tmdb()).encode(), project_tmdb_movie),
+                    ("sparql (built-in sample)", json.dumps(_sample_sparql()).encode(), project_sparql_rows)]
+
+    print(f"decoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+    for name, content, project in payloads:
+        paths = [("raw json.loads", json.loads), ("raw loads", loads), ("projected", lambda c: project(loads(c)))]
+        print(f"{name}: {len(content) / 1024.0:.1f} KB")
+        for label, fn in paths:
+            peak, retained = _memory_kb(fn, content)
+            print(f"  {label:15s} {_best_ms(fn, content, args.n):8.3f} ms   peak {peak:9.1f} KB   retained {retained:9.1f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
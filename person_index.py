@@ -0,0 +1,161 @@
+"""
+In-process person name index (TMDb person IDs)
+- Candidates come from exact normalized names/aliases, phonetic keys (whole name and
+  surname) and trigram blocking, so mangled LLM names ("Leonard de Caprio", "Jake Gylenhal")
+  still resolve. Heavier garbling ("Leonada di carpo", 80) stays under the verifiers'
+  PERSON_THR and goes to /search/person.
+- Rescored with rapidfuzz (spaced and space-insensitive), ranked with a popularity bonus.
+  A whole-name phonetic match adds a small bonus; a surname match alone does not, so
+  "Maggie Gyllenhaal" does not resolve to Jake Gyllenhaal.
+- Load a catalog with `load_jsonl` (TMDb daily person export: {"id", "name", "popularity"},
+  optional "also_known_as"); people from live /search/person results are added as they arrive.
+"""
+
+import re
+import gzip
+import json
+import math
+import threading
+from collections import Counter
+
+from rapidfuzz import fuzz
+
+from title_index import normalize_title as normalize_name, trigrams
+
+_PHONETIC_RULES = (("ph", "f"), ("ck", "k"), ("gh", "g"), ("kn", "n"), ("wr", "r"), ("sch", "sk"),
+                   ("sh", "x"), ("ch", "x"), ("th", "0"), ("qu", "kw"), ("x", "ks"))
+
+
+def phonetic_key(token):
+    """Metaphone-style consonant skeleton: first letter kept, vowels dropped, similar sounds merged."""
+    t = re.sub(r"[^a-z]", "", token.lower())
+    if not t:
+        return ""
+    for a, b in _PHONETIC_RULES:
+        t = t.replace(a, b)
+    t = re.sub(r"c(?=[eiy])", "s", t)
+    t = t.translate(str.maketrans("cqzvd", "kksft"))
+    key = t[0] + re.sub(r"[aeiouyhw]", "", t[1:])
+    return re.sub(r"(.)\1+", r"\1", key)
+
+
+def name_keys(norm):
+    tokens = norm.split()
+    keys = {"full:" + "".join(phonetic_key(t) for t in tokens)}
+    # surname key also lets a bare "Nolan" reach "Christopher Nolan" as a candidate
+    keys.add("last:" + phonetic_key(tokens[-1]))
+    if len(tokens) > 1:
+        keys.add("joined:" + phonetic_key("".join(tokens)))
+    return keys
+
+
+class PersonIndex:
+    def __init__(self, max_posting=5000, max_phonetic=300, block_grams=6, block_candidates=32, popularity_weight=3.0):
+        self.max_posting = max_posting
+        self.max_phonetic = max_phonetic
+        self.block_grams = block_grams
+        self.block_candidates = block_candidates
+        self.popularity_weight = popularity_weight
+        self._people = []       # doc -> {"id", "name", "popularity"}
+        self._doc_by_id = {}
+        self._entries = []      # entry -> (normalized name, doc)
+        self._seen = set()
+        self._exact = {}        # normalized name -> [entry]
+        self._phonetic = {}     # phonetic key -> [entry]
+        self._postings = {}     # trigram -> [entry]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._people)
+
+    def add(self, tmdb_id, name, popularity=0.0, aliases=()):
+        if not tmdb_id or not name:
+            return
+        with self._lock:
+            doc = self._doc_by_id.get(tmdb_id)
+            if doc is None:
+                doc = len(self._people)
+                self._people.append({"id": tmdb_id, "name": name, "popularity": popularity or 0.0})
+                self._doc_by_id[tmdb_id] = doc
+            elif popularity:
+                self._people[doc]["popularity"] = popularity
+            for alias in (name, *aliases):
+                norm = normalize_name(alias)
+                if not norm or (norm, doc) in self._seen:
+                    continue
+                self._seen.add((norm, doc))
+                entry = len(self._entries)
+                self._entries.append((norm, doc))
+                self._exact.setdefault(norm, []).append(entry)
+                for k in name_keys(norm):
+                    self._phonetic.setdefault(k, []).append(entry)
+                for g in trigrams(norm):
+                    self._postings.setdefault(g, []).append(entry)
+
+    def add_tmdb_results(self, results):
+        for p in results or []:
+            self.add(p.get("id"), p.get("name"), p.get("popularity"), p.get("also_known_as") or ())
+
+    def _candidates(self, norm):
+        entries = set(self._exact.get(norm, ()))
+        for k in name_keys(norm):
+            posting = self._phonetic.get(k, ())
+            if len(posting) <= self.max_phonetic:
+                entries.update(posting)
+        postings = [p for p in (self._postings.get(g) for g in trigrams(norm)) if p and len(p) <= self.max_posting]
+        postings.sort(key=len)
+        counts = Counter()
+        for p in postings[:self.block_grams]:
+            counts.update(p)
+        entries.update(e for e, _ in counts.most_common(self.block_candidates))
+        return entries
+
+    def search(self, name, k=5):
+        """
+        Top-k {"id", "name", "score", "popularity", "sounds_alike"} for `name`; score is the
+        match quality (0-100), sounds_alike whether the whole name matched phonetically.
+        """
+        norm = normalize_name(name)
+        if not norm:
+            return []
+        squashed = norm.replace(" ", "")
+        # a shared surname alone ("last:") says nothing about which family member is meant
+        keys = {k for k in name_keys(norm) if not k.startswith("last:")}
+        best = {}
+        for entry in self._candidates(norm):
+            text, doc = self._entries[entry]
+            score = max(fuzz.token_sort_ratio(norm, text), fuzz.ratio(squashed, text.replace(" ", "")))
+            alike = bool(keys & name_keys(text))
+            if alike:
+                score = min(100.0, score + 5)
+            if score > best.get(doc, (-1,))[0]:
+                best[doc] = (score, alike)
+
+        def rank(item):
+            doc, (score, _) = item
+            return score + self.popularity_weight * math.log10(1 + self._people[doc]["popularity"])
+        ranked = sorted(best.items(), key=rank, reverse=True)[:k]
+        return [{**self._people[doc], "score": round(score, 1), "sounds_alike": alike} for doc, (score, alike) in ranked]
+
+    def best(self, name, threshold=85, strict_threshold=90):
+        """
+        Best hit at or above `threshold` that is an exact name/alias or sounds alike as a whole
+        name; a spelling-only match needs `strict_threshold`, so siblings ("Maggie" vs "Jake
+        Gyllenhaal") fall through to the caller's remote search.
+        """
+        hits = [h for h in self.search(name, k=5)
+                if h["score"] >= threshold and (h["sounds_alike"] or h["score"] >= max(threshold, strict_threshold))]
+        return hits[0] if hits else None
+
+    def load_jsonl(self, path):
+        opener = gzip.open if path.endswith(".gz") else open
+        n = 0
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                p = json.loads(line)
+                self.add(p.get("id"), p.get("name"), p.get("popularity"), p.get("also_known_as") or ())
+                n += 1
+        return n
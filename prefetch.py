@@ -0,0 +1,59 @@
+"""
+Warm the verifier's lookup cache ahead of traffic.
+The cache lives inside the server process, so this posts to its /prefetch endpoint,
+which resolves each title and fetches TMDb (details + credits), OMDb and Wikidata
+with bounded concurrency.
+
+Usage:
+    python prefetch.py "Oppenheimer" "Barbie:2023"
+    python prefetch.py --file titles.txt --workers 8
+    python prefetch.py --trending --popular --pages 2
+"""
+
+import sys
+import argparse
+import requests
+
+
+def parse_title(line):
+    # "Title:YYYY" pins the release year
+    title, _, year = line.strip().rpartition(":")
+    if title and year.isdigit() and len(year) == 4:
+        return {"title": title.strip(), "year": int(year)}
+    return {"title": line.strip(), "year": None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prefetch movie records into the verifier cache.")
+    parser.add_argument("titles", nargs="*", help='titles to warm, optionally as "Title:YYYY"')
+    parser.add_argument("--file", help="file with one title per line")
+    parser.add_argument("--trending", action="store_true", help="also warm TMDb's weekly trending list")
+    parser.add_argument("--popular", action="store_true", help="also warm TMDb's popular list")
+    parser.add_argument("--pages", type=int, default=1, help="pages of each TMDb list (20 titles per page)")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent titles on the server (max 16)")
+    parser.add_argument("--server", default="http://localhost:5000", help="verifier base URL")
+    args = parser.parse_args(argv)
+
+    titles = [parse_title(t) for t in args.titles]
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            titles.extend(parse_title(l) for l in f if l.strip())
+    if not titles and not (args.trending or args.popular):
+        parser.error("give titles, --file, --trending or --popular")
+
+    payload = {"titles": titles, "trending": args.trending, "popular": args.popular,
+               "pages": args.pages, "workers": args.workers}
+    resp = requests.post(args.server.rstrip("/") + "/prefetch", json=payload, timeout=600)
+    data = resp.json()
+    if "error" in data:
+        print("Prefetch failed:", data["error"])
+        return 1
+    for r in data["results"]:
+        missing = [s for s in ("tmdb", "omdb", "wikidata") if not r[s]]
+        print(f"{r['title']}: " + ("ok" if not missing else "missing " + ", ".join(missing)))
+    print(f"\nPrefetched {data['prefetched']} titles.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,27 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import json
 import re
 import requests
 import os
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
 from rapidfuzz import fuzz
 
+from metrics import (timed, start_timings, render_prometheus, OMDB_LOOKUP_PATH, CACHE_LOOKUPS, TITLE_DISAMBIGUATIONS,
+                     CLAIM_PARSE, INCREMENTAL_SENTENCES)
+from tracing import span, traced
+from upstream import robust_get
+from cache import LookupCache
+from title_index import TitleIndex
+from batching import BatchLoader
+from payloads import loads, project_tmdb_movie, project_sparql_rows, record_version, JsonArrayStream
+from documents import DocumentStore, fingerprint
+from sessions import SessionStore, current_session, use_session
+
 # ---------------------------
 # API KEYS
 # ---------------------------
@@ -23,8 +38,10 @@ CORS(app)
 # ---------------------------
 # Claim extraction
 # ---------------------------
-def extract_claims(sentence: str):
-    prompt = f"""
+CLAIM_ATTRIBUTES = ["title", "director", "actor", "release_year", "award", "rating", "box_office", "genre",
+                    "runtime", "production_company", "language", "country", "franchise_info"]
+
+CLAIM_PROMPT = """
     Extract factual claims about a movie and return them strictly in JSON format.
     Each claim should be an object with two fields:
     - attribute (examples: director, actor, release_year, award, rating, box_office, genre, runtime, production_company, language, country, franchise_info, title)
@@ -34,16 +51,133 @@ def extract_claims(sentence: str):
 
     Only output JSON, nothing else.
     """
+
+# Structured output: the model is constrained to this schema, so the response is a bare JSON
+# array of typed claims. CLAIM_EXTRACTION_MODE=prose restores the prompt-only mode.
+CLAIM_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "attribute": {"type": "STRING", "enum": CLAIM_ATTRIBUTES},
+            "value": {"type": "STRING"},
+        },
+        "required": ["attribute", "value"],
+    },
+}
+SCHEMA_EXTRACTION = os.environ.get("CLAIM_EXTRACTION_MODE", "schema") != "prose"
+# CLAIM_EXTRACTOR=local swaps Gemini for the spaCy rules in local_extractor.py (CPU only, no API key).
+LOCAL_EXTRACTION = os.environ.get("CLAIM_EXTRACTOR", "gemini") == "local"
+
+def _generate_claims(sentence, stream=False):
     model = genai.GenerativeModel("gemini-2.5-flash")
-    response = model.generate_content(prompt)
-    text = response.text.strip()
+    config = {"response_mime_type": "application/json", "response_schema": CLAIM_SCHEMA} if SCHEMA_EXTRACTION else None
+    return model.generate_content(CLAIM_PROMPT.format(sentence=sentence), generation_config=config, stream=stream)
+
+def _valid_claim(claim):
+    return (isinstance(claim, dict) and claim.get("attribute") in CLAIM_ATTRIBUTES
+            and isinstance(claim.get("value"), (str, int, float)))
+
+def _parse_claims_text(text):
+    text = text.strip()
     try:
         claims = json.loads(text)
+        CLAIM_PARSE.inc(mode="prose", result="ok")
+        return claims
     except json.JSONDecodeError:
         match = re.search(r'\[.*\]', text, re.DOTALL)
-        claims = json.loads(match.group(0)) if match else []
+        if not match:
+            CLAIM_PARSE.inc(mode="prose", result="failed")
+            return []
+        try:
+            claims = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            CLAIM_PARSE.inc(mode="prose", result="failed")
+            raise
+        CLAIM_PARSE.inc(mode="prose", result="repaired")
+        return claims
+
+def _parse_schema_claims(text):
+    try:
+        items = loads(text)
+    except ValueError:
+        CLAIM_PARSE.inc(mode="schema", result="failed")
+        return _parse_claims_text(text)
+    if not isinstance(items, list):
+        CLAIM_PARSE.inc(mode="schema", result="failed")
+        return []
+    claims = [c for c in items if _valid_claim(c)]
+    CLAIM_PARSE.inc(mode="schema", result="ok" if len(claims) == len(items) else "invalid_items")
     return claims
 
+@traced()
+def extract_claims(sentence: str):
+    with timed("extract_claims"):
+        if LOCAL_EXTRACTION:
+            from local_extractor import extract_claims_local
+            return extract_claims_local(sentence)
+        response = _generate_claims(sentence)
+        claims = _parse_schema_claims(response.text) if SCHEMA_EXTRACTION else _parse_claims_text(response.text)
+    return claims
+
+# One call for the frontend's answer and its claims: the schema wraps the answer text and the
+# same typed claim list, so /verify can skip its own extraction call.
+ANSWER_PROMPT = """
+    Answer the following question about movies. Then list every factual claim your answer makes
+    about a movie as objects with an attribute and a value.
+
+    Question: "{question}"
+    """
+ANSWER_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "answer": {"type": "STRING", "description": "the answer shown to the user, in markdown"},
+        "claims": CLAIM_SCHEMA,
+    },
+    "required": ["answer", "claims"],
+}
+
+@traced()
+def generate_answer_with_claims(question: str):
+    """Returns (answer, claims); claims is None when the response could not be decoded."""
+    with timed("generate_answer"):
+        model = genai.GenerativeModel("gemini-2.5-flash")
+        response = model.generate_content(ANSWER_PROMPT.format(question=question), generation_config={
+            "response_mime_type": "application/json", "response_schema": ANSWER_SCHEMA})
+        try:
+            data = loads(response.text)
+        except ValueError:
+            CLAIM_PARSE.inc(mode="answer", result="failed")
+            return response.text, None
+    items = data.get("claims") or []
+    claims = [c for c in items if _valid_claim(c)]
+    CLAIM_PARSE.inc(mode="answer", result="ok" if len(claims) == len(items) else "invalid_items")
+    return data.get("answer", ""), claims
+
+def extract_claims_stream(sentence: str):
+    """Yield each claim object as soon as it is complete in Gemini's streamed output."""
+    if LOCAL_EXTRACTION:
+        yield from extract_claims(sentence)
+        return
+    with timed("extract_claims.stream"):
+        parser = JsonArrayStream()
+        text, yielded = [], 0
+        for chunk in _generate_claims(sentence, stream=True):
+            try:
+                piece = chunk.text
+            except ValueError:  # chunk without text parts (e.g. safety metadata)
+                continue
+            text.append(piece)
+            for claim in parser.feed(piece):
+                if _valid_claim(claim):
+                    yielded += 1
+                    yield claim
+        if yielded:
+            CLAIM_PARSE.inc(mode="schema" if SCHEMA_EXTRACTION else "prose", result="ok")
+        else:
+            # no array in the stream; same recovery as the blocking path
+            yield from _parse_claims_text("".join(text))
+
 # ---------------------------
 # Helpers
 # ---------------------------
@@ -69,36 +203,141 @@ def extract_year(value):
     return match.group(1) if match else None
 
 # ---------------------------
-# TMDB Smart Search
+# Source fetchers (cached)
 # ---------------------------
-def get_tmdb_movie_info(title, year_hint=None):
-    url = f"https://api.themoviedb.org/3/search/movie?api_key={TMDB_API_KEY}&query={title}"
-    resp = requests.get(url).json()
-    if not resp.get("results"): return {}
-    candidates = resp["results"]
+# Positive entries are served stale and refreshed in the background once past TTL;
+# "no match" responses are cached briefly so hallucinated titles don't hit all three APIs every time.
+TMDB_CACHE = LookupCache("tmdb")
+OMDB_CACHE = LookupCache("omdb")
+WIKIDATA_CACHE = LookupCache("wikidata")
 
+# Local title index: resolves (misspelled) titles to TMDb IDs before any network search.
+# Seeded from TITLE_INDEX_PATH (JSON lines, see title_index.py) and grown from live search results.
+LOCAL_TITLE_THR = 92
+TITLE_INDEX = TitleIndex()
+if os.environ.get("TITLE_INDEX_PATH"):
+    print(f"Loaded {TITLE_INDEX.load_jsonl(os.environ['TITLE_INDEX_PATH'])} titles into the local index")
+
+def _key(value):
+    return re.sub(r"\s+", " ", str(value)).strip().lower()
+
+def tmdb_search_movie(title):
+    def fetch():
+        with timed("tmdb.search"):
+            resp = robust_get("https://api.themoviedb.org/3/search/movie",
+                              params={"api_key": TMDB_API_KEY, "query": title}, source="tmdb").json()
+        TITLE_INDEX.add_tmdb_results(resp.get("results"))
+        return resp.get("results", [])
+    return TMDB_CACHE.get_or_fetch(("search", _key(title)), fetch)
+
+def tmdb_movie_details(movie_id):
+    def fetch():
+        with timed("tmdb.details"):
+            resp = robust_get(
+                f"https://api.themoviedb.org/3/movie/{movie_id}",
+                params={"api_key": TMDB_API_KEY, "append_to_response": "credits,belongs_to_collection,external_ids"},
+                source="tmdb",
+            )
+            # full cast/crew lists run to hundreds of entries; keep only what verification reads
+            return project_tmdb_movie(loads(resp.content))
+    return TMDB_CACHE.get_or_fetch(("movie", movie_id), fetch, is_negative=lambda d: not d.get("id"))
+
+def omdb_search(title):
+    def fetch():
+        with timed("omdb.search"):
+            resp = robust_get("http://www.omdbapi.com/", params={"s": title, "apikey": OMDB_API_KEY}, source="omdb").json()
+        return resp.get("Search", [])
+    return OMDB_CACHE.get_or_fetch(("search", _key(title)), fetch)
+
+def omdb_lookup_title(title, year=None):
+    params = {"t": title, "apikey": OMDB_API_KEY}
+    if year:
+        params["y"] = str(year)
+
+    def fetch():
+        with timed("omdb.title"):
+            return robust_get("http://www.omdbapi.com/", params=params, source="omdb").json()
+    return OMDB_CACHE.get_or_fetch(("title", _key(title), year), fetch, is_negative=lambda d: d.get("Response") != "True")
+
+def omdb_details(imdb_id):
+    def fetch():
+        with timed("omdb.details"):
+            return robust_get("http://www.omdbapi.com/", params={"i": imdb_id, "apikey": OMDB_API_KEY}, source="omdb").json()
+    return OMDB_CACHE.get_or_fetch(("id", imdb_id), fetch, is_negative=lambda d: d.get("Response") != "True")
+
+def tmdb_find_by_imdb(imdb_id):
+    def fetch():
+        with timed("tmdb.find"):
+            resp = robust_get(f"https://api.themoviedb.org/3/find/{imdb_id}",
+                              params={"api_key": TMDB_API_KEY, "external_source": "imdb_id"}, source="tmdb").json()
+        return resp.get("movie_results", [])
+    results = TMDB_CACHE.get_or_fetch(("find", imdb_id), fetch)
+    return results[0]["id"] if results else None
+
+# ---------------------------
+# TMDB Smart Search
+# ---------------------------
+def pick_tmdb_candidate(title, candidates, year_hint=None):
     best = max(candidates, key=lambda x: fuzz.token_set_ratio(title.lower(), x["title"].lower()))
     if year_hint:
         best_year = best.get("release_date", "0000")[:4]
         if abs(int(best_year or 0) - year_hint) > 2:
             best = min(candidates, key=lambda x: abs(int(x.get("release_date", "9999")[:4]) - year_hint))
+    return best
+
+# Same-name films and remakes score alike on title; when the claims carry something that tells
+# them apart, fetch the top-k candidates' details in parallel and keep the one the claims agree with.
+DISAMBIGUATION_TOP_K = 3
+DISAMBIGUATION_MARGIN = 5     # title-score points from the best that still count as ambiguous
+AGREEMENT_ATTRIBUTES = ("release_year", "director", "actor")
+_detail_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tmdb-details")  # shared concurrency budget
+
+def claim_agreement(details, claims):
+    credits = details.get("credits") or {}
+    directors = {c["name"].lower() for c in credits.get("crew", []) if c.get("job", "").lower() == "director"}
+    cast = {c["name"].lower() for c in credits.get("cast", [])}
+    score = 0
+    for c in claims:
+        attr, val = c["attribute"].lower(), str(c["value"]).lower()
+        if attr == "release_year": score += val == extract_year(details.get("release_date"))
+        elif attr == "director": score += val in directors
+        elif attr == "actor": score += val in cast
+    return score
+
+def agrees_with_claims(details, claims):
+    """Whether a film's TMDb details match every director/actor/release-year claim (True if none)."""
+    checks = [c for c in claims or () if c["attribute"].lower() in AGREEMENT_ATTRIBUTES]
+    return claim_agreement(details, checks) == len(checks)
 
-    movie_id = best["id"]
-    details = requests.get(
-        f"https://api.themoviedb.org/3/movie/{movie_id}?api_key={TMDB_API_KEY}&append_to_response=credits,belongs_to_collection"
-    ).json()
-    return details
+def choose_tmdb_candidate(title, candidates, year_hint=None, claims=None):
+    default = pick_tmdb_candidate(title, candidates, year_hint)
+    if not claims or not any(c["attribute"].lower() in AGREEMENT_ATTRIBUTES for c in claims):
+        return default
+    scored = sorted(((fuzz.token_set_ratio(title.lower(), c["title"].lower()), c) for c in candidates),
+                    key=lambda x: -x[0])
+    top = [c for score, c in scored[:DISAMBIGUATION_TOP_K] if score >= scored[0][0] - DISAMBIGUATION_MARGIN]
+    if len(top) < 2:
+        return default
+
+    with timed("tmdb.disambiguate"), span("disambiguate", candidates=len(top)):
+        futures = [(c, _detail_pool.submit(contextvars.copy_context().run, tmdb_movie_details, c["id"])) for c in top]
+        ranked = []
+        for c, fut in futures:
+            try:
+                ranked.append((claim_agreement(fut.result(), claims), c["id"] == default["id"], c))
+            except requests.exceptions.RequestException as e:
+                print("TMDb details error:", e)
+    if not ranked:
+        return default
+    agreement, _, best = max(ranked, key=lambda r: (r[0], r[1]))
+    chosen = best if agreement > 0 else default
+    TITLE_DISAMBIGUATIONS.inc(result="kept" if chosen["id"] == default["id"] else "switched")
+    return chosen
 
 # ---------------------------
 # OMDB Smart Search
 # ---------------------------
-def get_omdb_movie_info(title, year_hint=None):
-    search_url = f"http://www.omdbapi.com/?s={title}&apikey={OMDB_API_KEY}"
-    search_resp = requests.get(search_url).json()
-    if "Search" not in search_resp: return {}
-
-    candidates = search_resp["Search"]
-
+def pick_omdb_candidate(title, candidates, year_hint=None):
     # Pick best fuzzy match first
     chosen = max(candidates, key=lambda x: fuzz.token_set_ratio(title.lower(), x["Title"].lower()))
 
@@ -108,22 +347,45 @@ def get_omdb_movie_info(title, year_hint=None):
             match = re.match(r"(\d{4})", y)
             return int(match.group(1)) if match else 9999
         chosen = min(candidates, key=lambda x: abs(extract_start_year(x) - year_hint))
+    return chosen
 
-    imdb_id = chosen["imdbID"]
-    detail_url = f"http://www.omdbapi.com/?i={imdb_id}&apikey={OMDB_API_KEY}"
-    return requests.get(detail_url).json()
+@traced()
+def get_omdb_movie_info(title, year_hint=None):
+    # One-shot ?t=&y= lookup first; the ?s= search + ?i= detail pair only on a miss.
+    try:
+        direct = omdb_lookup_title(title, year_hint)
+    except requests.exceptions.RequestException as e:
+        print("OMDb title lookup error:", e)
+        direct = {}
+    if direct.get("Response") == "True":
+        OMDB_LOOKUP_PATH.inc(path="direct")
+        OMDB_CACHE.set(("id", direct["imdbID"]), direct)
+        return direct
+
+    try:
+        candidates = omdb_search(title)
+    except requests.exceptions.RequestException as e:
+        print("OMDb search error:", e)
+        return {}
+    if not candidates:
+        OMDB_LOOKUP_PATH.inc(path="miss")
+        return {}
+    OMDB_LOOKUP_PATH.inc(path="search")
+
+    imdb_id = pick_omdb_candidate(title, candidates, year_hint)["imdbID"]
+    try:
+        return omdb_details(imdb_id)
+    except requests.exceptions.RequestException as e:
+        print("OMDb details error:", e)
+        return {}
 
 # ---------------------------
 # Wikidata Smart Search
 # ---------------------------
-def get_wikidata_movie_info(title):
-    endpoint = "https://query.wikidata.org/sparql"
-    query = f"""
+WIKIDATA_MOVIE_QUERY = """
     SELECT ?item ?itemLabel ?directorLabel ?publicationDate ?boxOffice ?castLabel ?genreLabel ?awardLabel ?runtime ?productionCompanyLabel ?originalLanguageLabel ?countryLabel ?partOfLabel WHERE {{
       ?item wdt:P31 wd:Q11424.
-      ?item rdfs:label ?label.
-      FILTER(LANG(?label) = "en").
-      FILTER(CONTAINS(LCASE(?label), LCASE("{title}"))).
+      {match}
       OPTIONAL {{ ?item wdt:P57 ?director. }}
       OPTIONAL {{ ?item wdt:P577 ?publicationDate. }}
       OPTIONAL {{ ?item wdt:P2142 ?boxOffice. }}
@@ -137,145 +399,686 @@ def get_wikidata_movie_info(title):
       OPTIONAL {{ ?item wdt:P179 ?partOf. }}
       SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
     }}
-    LIMIT 10
+    LIMIT {limit}
     """
+
+def _wikidata_sparql(query):
+    endpoint = "https://query.wikidata.org/sparql"
     headers = {"Accept": "application/sparql-results+json"}
-    resp = requests.get(endpoint, params={"query": query}, headers=headers).json()
-    return resp.get("results", {}).get("bindings", [])
+    with timed("wikidata.sparql"):
+        resp = robust_get(endpoint, params={"query": query}, headers=headers, timeout=15, source="wikidata")
+        return project_sparql_rows(loads(resp.content))
+
+def _wikidata_movie_rows(cache_key, match=None, limit=None, fetch=None):
+    if fetch is None:
+        query = WIKIDATA_MOVIE_QUERY.format(match=match, limit=limit)
+        fetch = lambda: _wikidata_sparql(query)
+    try:
+        return WIKIDATA_CACHE.get_or_fetch(cache_key, fetch)
+    except requests.exceptions.RequestException as e:
+        print("Wikidata SPARQL error:", e)
+        return []
+
+# Rows allowed for one film's cast/genre/award cross product in exact lookups.
+MOVIE_ROWS_PER_FILM = 200
+
+# By-QID film lookups from concurrent requests are coalesced into one query; Wikidata's
+# endpoint limits query count far more than query size. Each film is its own sub-select with
+# its own LIMIT, so a film with a large cross product can't crowd the others out of the batch
+# (and get them negative-cached as "no rows").
+def _batch_movie_rows(qids):
+    branches = " UNION ".join(
+        "{ %s }" % WIKIDATA_MOVIE_QUERY.format(match=f"VALUES ?item {{ wd:{q} }}", limit=MOVIE_ROWS_PER_FILM)
+        for q in qids)
+    rows = _wikidata_sparql(f"SELECT * WHERE {{ {branches} }}")
+    grouped = {q: [] for q in qids}
+    for row in rows:
+        grouped.setdefault(row["item"]["value"].rsplit("/", 1)[-1], []).append(row)
+    return grouped
+
+MOVIE_QID_LOADER = BatchLoader("wikidata_movie", _batch_movie_rows)
+
+@traced()
+def get_wikidata_movie_info(title):
+    match = f"""?item rdfs:label ?label.
+      FILTER(LANG(?label) = "en").
+      FILTER(CONTAINS(LCASE(?label), LCASE("{title}")))."""
+    return _wikidata_movie_rows(("movie", _key(title)), match, 10)
+
+@traced()
+def get_wikidata_movie_by_id(qid=None, imdb_id=None, tmdb_id=None):
+    # Exact lookups for a single film, so allow more rows for the cast/genre/award cross product.
+    if qid:
+        return _wikidata_movie_rows(("qid", qid), fetch=lambda: MOVIE_QID_LOADER.load(qid))
+    if imdb_id:
+        return _wikidata_movie_rows(("imdb", imdb_id), f'?item wdt:P345 "{imdb_id}".', MOVIE_ROWS_PER_FILM)
+    if tmdb_id:
+        return _wikidata_movie_rows(("tmdb", tmdb_id), f'?item wdt:P4947 "{tmdb_id}".', MOVIE_ROWS_PER_FILM)
+    return []
+
+# ---------------------------
+# Entity resolution
+# ---------------------------
+# Search one source for the film, then fetch the others by external ID (TMDb external_ids /
+# /find, OMDb ?i=, Wikidata P345/P4947) so all three describe the same film.
+@traced()
+def resolve_film(title, year_hint=None, claims=None):
+    ids = {"tmdb_id": None, "imdb_id": None, "wikidata_qid": None}
+    with timed("title_index"):
+        # sequel numbers must agree: "Avatar 3" falls through to a remote search, not to "Avatar"
+        hits = TITLE_INDEX.search(title, year_hint, k=DISAMBIGUATION_TOP_K, same_numbers=True)
+    local = hits[0] if hits and hits[0]["score"] >= LOCAL_TITLE_THR else None
+    CACHE_LOOKUPS.inc(cache="title_index", result="hit" if local else "miss")
+    if local:
+        close = [{"id": h["id"], "title": h["title"], "release_date": str(h["year"] or "9999")}
+                 for h in hits if h["score"] >= local["score"] - DISAMBIGUATION_MARGIN]
+        ids["tmdb_id"] = choose_tmdb_candidate(title, close, year_hint, claims)["id"] if len(close) > 1 else local["id"]
+        return ids
+    # Prefer whichever lookup is already cached; otherwise TMDb, whose details carry all external IDs.
+    omdb_cached = ((OMDB_CACHE.peek(("title", _key(title), year_hint)) or {}).get("Response") == "True"
+                   or bool(OMDB_CACHE.peek(("search", _key(title)))))
+    omdb_first = TMDB_CACHE.peek(("search", _key(title))) is None and bool(omdb_cached)
+    try:
+        if not omdb_first:
+            candidates = tmdb_search_movie(title)
+            if candidates:
+                ids["tmdb_id"] = choose_tmdb_candidate(title, candidates, year_hint, claims)["id"]
+        if ids["tmdb_id"] is None:
+            ids["imdb_id"] = get_omdb_movie_info(title, year_hint).get("imdbID")
+            if ids["imdb_id"]:
+                ids["tmdb_id"] = tmdb_find_by_imdb(ids["imdb_id"])
+    except requests.exceptions.RequestException as e:
+        print("Film resolution error:", e)
+    return ids
+
+@traced()
+def fetch_film_records(title, year_hint=None, claims=None):
+    """Return (tmdb, omdb, wikidata) records for one resolved film; `claims` help pick between same-name films."""
+    session = current_session()
+    if session is None:
+        return _fetch_film_records(title, year_hint, claims)
+    # a turn that never names the film (it follows the conversation) takes the remembered one as is;
+    # one that names it must also agree with the turn's director/actor/year claims, or it is
+    # re-resolved like any other request (a second "Titanic" need not be the same film)
+    implicit = claims is not None and not any(c["attribute"].lower() == "title" for c in claims)
+    film = session.film(_key(title), None if implicit else year_hint)
+    if film and not implicit and not agrees_with_claims(film["records"][0], claims):
+        film = None
+    CACHE_LOOKUPS.inc(cache="session", result="hit" if film else "miss")
+    if film:
+        return film["records"]
+    records = _fetch_film_records(title, year_hint, claims)
+    tmdb, omdb, _ = records
+    if tmdb or omdb:
+        year = extract_year(tmdb.get("release_date") or omdb.get("Year"))
+        session.remember(_key(title), title, int(year) if year else None,
+                         records, _film_people(tmdb, omdb))
+    return records
+
+def _film_people(tmdb, omdb):
+    """Director and top-billed actor, for follow-up references like "its director"."""
+    credits = tmdb.get("credits") or {}
+    directors = [c["name"] for c in credits.get("crew", []) if c.get("job") == "Director"]
+    cast = [c["name"] for c in credits.get("cast", [])]
+    directors = directors or [n.strip() for n in omdb.get("Director", "").split(",") if n.strip()]
+    cast = cast or [n.strip() for n in omdb.get("Actors", "").split(",") if n.strip()]
+    return {"director": directors[0] if directors else None, "actor": cast[0] if cast else None}
+
+def _fetch_film_records(title, year_hint, claims):
+    ids = resolve_film(title, year_hint, claims)
+
+    tmdb = {}
+    if ids["tmdb_id"]:
+        try:
+            tmdb = tmdb_movie_details(ids["tmdb_id"])
+        except requests.exceptions.RequestException as e:
+            print("TMDb details error:", e)
+    external = tmdb.get("external_ids") or {}
+    ids["imdb_id"] = ids["imdb_id"] or tmdb.get("imdb_id") or external.get("imdb_id")
+    ids["wikidata_qid"] = external.get("wikidata_id")
+
+    if ids["imdb_id"]:
+        try:
+            omdb = omdb_details(ids["imdb_id"])
+        except requests.exceptions.RequestException as e:
+            print("OMDb details error:", e)
+            omdb = {}
+    else:
+        omdb = get_omdb_movie_info(title, year_hint)
+    if omdb.get("Response") == "False":
+        omdb = {}
+
+    if ids["wikidata_qid"] or ids["imdb_id"] or ids["tmdb_id"]:
+        wikidata = get_wikidata_movie_by_id(ids["wikidata_qid"], ids["imdb_id"], ids["tmdb_id"])
+    else:
+        wikidata = get_wikidata_movie_info(title)
+    return tmdb, omdb, wikidata
+
+# ---------------------------
+# Cache warm-up
+# ---------------------------
+PREFETCH_WORKERS = 4
+
+def tmdb_list_titles(kind="trending", pages=1):
+    path = "trending/movie/week" if kind == "trending" else f"movie/{kind}"
+    titles = []
+    for page in range(1, pages + 1):
+        resp = robust_get(f"https://api.themoviedb.org/3/{path}",
+                          params={"api_key": TMDB_API_KEY, "page": page}, source="tmdb").json()
+        titles.extend((m["title"], extract_year(m.get("release_date"))) for m in resp.get("results", []) if m.get("title"))
+    return titles
+
+def prefetch_title(title, year=None):
+    year_hint = int(year) if year else None
+    with span("prefetch", title=title):
+        tmdb, omdb, wikidata = fetch_film_records(title, year_hint)
+    return {"title": title, "tmdb": bool(tmdb), "omdb": bool(omdb), "wikidata": bool(wikidata)}
+
+def prefetch_titles(titles, max_workers=PREFETCH_WORKERS):
+    """Resolve and fetch every source for each (title, year) so later /verify calls hit the cache."""
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch") as pool:
+        return list(pool.map(lambda t: prefetch_title(*t), titles))
 
 # ---------------------------
 # Claim Verification
 # ---------------------------
-def verify_claims(claims, title):
+@traced()
+def verify_claims(claims, title, known=None):
+    """`known` maps claim indices to earlier results that are reused instead of re-checked."""
+    with timed("verify_claims"):
+        return _verify_claims(claims, title, known or {})
+
+def _year_hint(claims):
     year_hint = None
     for c in claims:
         if c["attribute"].lower() == "release_year":
             try: year_hint = int(c["value"])
             except: pass
+    return year_hint
 
-    tmdb = get_tmdb_movie_info(title, year_hint)
-    omdb = get_omdb_movie_info(title, year_hint)
-    wikidata = get_wikidata_movie_info(title)
+def _verify_claims(claims, title, known):
+    if known and len(known) == len(claims):
+        return [known[i] for i in range(len(claims))]
+    year_hint = _year_hint(claims)
+
+    tmdb, omdb, wikidata = fetch_film_records(title, year_hint, claims)
+    scope = verdict_scope(tmdb, omdb, wikidata)
 
     results = []
 
-    for claim in claims:
-        attr, val = claim["attribute"].lower(), str(claim["value"]).lower()
-        verdicts = []
-        sources_used = set()
-
-        # --- TITLE ---
-        if attr == "title":
-            tmdb_title = tmdb.get("title", "").lower()
-            omdb_title = omdb.get("Title", "").lower()
-            wikidata_titles = [e["itemLabel"]["value"].lower() for e in wikidata if "itemLabel" in e]
-            matched = fuzzy_match(val, [tmdb_title, omdb_title] + wikidata_titles)
-            verdicts.append(matched)
-            if tmdb_title: sources_used.add("TMDB")
-            if omdb_title: sources_used.add("OMDB")
-            if wikidata_titles: sources_used.add("Wikidata")
-
-        # --- DIRECTOR / ACTOR ---
-        if attr in ["director", "actor"]:
-            val_lower = val.lower()
-            matched = False
-            if tmdb and "credits" in tmdb:
-                if attr == "director":
-                    directors = [c["name"].lower() for c in tmdb["credits"]["crew"] if c.get("job","").lower()=="director"]
-                    if val_lower in directors: matched = True
-                else:
-                    actors = [c["name"].lower() for c in tmdb["credits"]["cast"]]
-                    if val_lower in actors: matched = True
-                sources_used.add("TMDB")
-            if omdb:
-                key = "Director" if attr=="director" else "Actors"
-                if omdb.get(key):
-                    names = [n.strip().lower() for n in omdb[key].split(",")]
-                    if val_lower in names: matched = True
-                sources_used.add("OMDB")
-            if wikidata:
-                key = "directorLabel" if attr=="director" else "castLabel"
-                wd_names = [entry[key]["value"].lower() for entry in wikidata if key in entry]
-                if val_lower in wd_names: matched = True
-                sources_used.add("Wikidata")
-            verdicts.append(matched)
-
-        # --- RELEASE YEAR ---
-        if attr=="release_year":
-            if tmdb.get("release_date"): verdicts.append(val==extract_year(tmdb["release_date"]).lower()); sources_used.add("TMDB")
-            if omdb.get("Year"): verdicts.append(val==extract_year(omdb["Year"]).lower()); sources_used.add("OMDB")
-            if any(val==extract_year(entry.get("publicationDate", {}).get("value","")) for entry in wikidata if "publicationDate" in entry): verdicts.append(True); sources_used.add("Wikidata")
-
-        # --- BOX OFFICE ---
-        if attr=="box_office":
-            claim_val = parse_money(val)
-            matched = False
-            if tmdb.get("revenue"): tmdb_val=float(tmdb.get("revenue")); matched |= claim_val and abs(claim_val-tmdb_val)/tmdb_val<0.1; sources_used.add("TMDB")
-            if omdb.get("BoxOffice"): omdb_val=parse_money(omdb.get("BoxOffice")); matched |= claim_val and omdb_val and abs(claim_val-omdb_val)/omdb_val<0.1; sources_used.add("OMDB")
-            if wikidata:
-                for entry in wikidata:
-                    if "boxOffice" in entry: wik_val=parse_money(entry["boxOffice"]["value"]); matched |= claim_val and wik_val and abs(claim_val-wik_val)/wik_val<0.1; sources_used.add("Wikidata")
-            verdicts.append(matched)
-
-        # --- GENRE / AWARD / RATING / RUNTIME / LANGUAGE / COUNTRY / PRODUCTION / FRANCHISE ---
-        if attr in ["genre","award","rating","runtime","language","country","production_company","franchise_info"]:
-            # TMDB
-            if attr=="genre" and "genres" in tmdb: verdicts.append(fuzzy_match(val,[g["name"] for g in tmdb["genres"]])); sources_used.add("TMDB")
-            if attr=="rating" and tmdb.get("vote_average"): verdicts.append(abs(float(tmdb["vote_average"])-float(val))<1); sources_used.add("TMDB")
-            if attr=="runtime" and tmdb.get("runtime"): verdicts.append(str(tmdb["runtime"]) in val or val in str(tmdb["runtime"])); sources_used.add("TMDB")
-            if attr=="franchise_info":
-                found=False
-                if tmdb.get("belongs_to_collection"):
-                    coll_name = tmdb["belongs_to_collection"]["name"].lower()
-                    if val in coll_name: verdicts.append(True); found=True
-                for entry in wikidata:
-                    if "partOfLabel" in entry and val in entry["partOfLabel"]["value"].lower(): verdicts.append(True); found=True; sources_used.add("Wikidata")
-                if not found: verdicts.append(False)
-
-            # OMDB
-            if omdb:
-                if attr=="genre" and omdb.get("Genre"): verdicts.append(fuzzy_match(val,omdb["Genre"].split(","))); sources_used.add("OMDB")
-                if attr=="award" and omdb.get("Awards"): verdicts.append(fuzzy_match(val,[omdb["Awards"]])); sources_used.add("OMDB")
-                if attr=="production_company" and omdb.get("Production"): verdicts.append(fuzzy_match(val,[omdb["Production"]])); sources_used.add("OMDB")
-                if attr=="language" and omdb.get("Language"): verdicts.append(fuzzy_match(val,omdb["Language"].split(","))); sources_used.add("OMDB")
-                if attr=="country" and omdb.get("Country"): verdicts.append(fuzzy_match(val,omdb["Country"].split(","))); sources_used.add("OMDB")
-
-        # --- FINAL VERDICT ---
-        if not sources_used: status=" No Data Available"
-        elif all(verdicts): status=" Correct"
-        elif any(verdicts): status=" Mixed/Partial"
-        else: status="Incorrect"
-
-        results.append({"claim":claim,"status":status,"sources_used":list(sources_used)})
+    for i, claim in enumerate(claims):
+        if i in known:
+            results.append(known[i])
+            continue
+        with span("claim", attribute=claim.get("attribute")):
+            results.append(verify_claim_cached(claim, tmdb, omdb, wikidata, scope))
+
+    return results
+
+# Verdict memo: a verdict depends only on the claim's attribute and value and on the film's
+# records, so it is stored under (film ID, attribute, value, data version), where the version is
+# a content hash of the records. Popular claims become one lookup; a changed source record has
+# a new version, so its old verdicts are never served again and just age out of the LRU.
+# Such an entry never goes stale, so it never expires or revalidates in the background.
+VERDICT_CACHE = LookupCache("verdict", ttl=float("inf"), max_entries=int(os.environ.get("VERDICT_CACHE_SIZE", 200000)))
+
+# Cached records are shared, read-only objects until a refresh replaces them, so each record
+# set is hashed once; holding the records keeps their ids from being reused while listed.
+# The memo only needs the films being verified right now (a miss costs one hash), and every
+# entry keeps its records alive past their eviction from the source caches, so keep it small.
+_versions = OrderedDict()   # (id(tmdb), id(omdb), id(wikidata)) -> (records, version)
+_versions_lock = threading.Lock()
+VERSION_MEMO_SIZE = int(os.environ.get("VERSION_MEMO_SIZE", 512))
+
+def _data_version(records):
+    key = tuple(id(r) for r in records)
+    with _versions_lock:
+        hit = _versions.get(key)
+    if hit is not None and all(a is b for a, b in zip(hit[0], records)):
+        return hit[1]
+    version = record_version(*records)
+    with _versions_lock:
+        _versions[key] = (records, version)
+        _versions.move_to_end(key)
+        while len(_versions) > VERSION_MEMO_SIZE:
+            _versions.popitem(last=False)
+    return version
+
+def verdict_scope(tmdb, omdb, wikidata):
+    """(film ID, data version) of one film's records; compute once per film, not per claim."""
+    film_id = tmdb.get("id") or omdb.get("imdbID") or next(
+        (e["item"]["value"] for e in wikidata if "item" in e), None)
+    return film_id, _data_version((tmdb, omdb, wikidata))
+
+def verify_claim_cached(claim, tmdb, omdb, wikidata, scope):
+    film_id, version = scope
+    key = (film_id, claim["attribute"].lower(), str(claim["value"]).lower(), version)
+    status, sources_used = VERDICT_CACHE.get_or_fetch(
+        key, lambda: _verdict(_verify_claim(claim, tmdb, omdb, wikidata)), is_negative=lambda v: False)
+    return {"claim": claim, "status": status, "sources_used": list(sources_used)}
+
+def _verdict(result):
+    return result["status"], tuple(result["sources_used"])
+
+DEFAULT_TITLE = "Avengers: Endgame"
 
+# Streaming mode: claims arrive one by one from extract_claims_stream and are grouped by film
+# the way group_claims_by_film groups one chunk. A film's records are fetched as soon as its
+# group has a claim that tells same-name films apart (director, actor, release year), or when the
+# stream ends, and each claim is checked once both are ready, so source lookups overlap the rest
+# of the generation. Claims only wait on records, never the reverse. If claims arriving after the
+# fetch disagree with the film it picked, the film is re-resolved with all of its claims, as the
+# blocking path would have.
+_records_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="stream-records")
+_stream_claim_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="stream-claims")
+
+def _fetch_with_scope(title, year_hint, claims):
+    records = fetch_film_records(title, year_hint, claims)
+    return records, verdict_scope(*records)
+
+def _verify_when_ready(claim, records):
+    (tmdb, omdb, wikidata), scope = records.result()
+    with span("claim", attribute=claim.get("attribute")):
+        return verify_claim_cached(claim, tmdb, omdb, wikidata, scope)
+
+def _disambiguates(claim):
+    return claim["attribute"].lower() in AGREEMENT_ATTRIBUTES
+
+@traced()
+def verify_claims_streaming(claim_stream, default_title=DEFAULT_TITLE):
+    """Returns (claims, results) in arrival order."""
+    with timed("verify_claims"):
+        claims, futures = [], []
+        groups, leading = {}, []   # film key -> {"title", "indices", "records", "seen"}; claims before any title
+        current = None
+
+        def start_records(group):
+            group_claims = [claims[i] for i in group["indices"]]
+            group["seen"] = [c for c in group_claims if _disambiguates(c)]
+            group["records"] = _records_pool.submit(contextvars.copy_context().run, _fetch_with_scope,
+                                                    group["title"], _year_hint(group_claims), group_claims)
+            for i in group["indices"]:
+                submit(group, i)
+
+        def submit(group, i):
+            futures[i] = _stream_claim_pool.submit(contextvars.copy_context().run, _verify_when_ready,
+                                                   claims[i], group["records"])
+
+        for claim in claim_stream:
+            i = len(claims)
+            claims.append(claim)
+            futures.append(None)
+            if claim["attribute"].lower() == "title":
+                current = groups.get(_key(claim["value"]))
+                if current is None:
+                    current = groups[_key(claim["value"])] = {"title": claim["value"], "indices": [], "records": None}
+                    if len(groups) == 1:
+                        current["indices"], leading = leading, []
+            if current is None:
+                leading.append(i)
+                continue
+            current["indices"].append(i)
+            if current["records"] is not None:
+                submit(current, i)
+            elif any(_disambiguates(claims[j]) for j in current["indices"]):
+                start_records(current)
+        if not groups:
+            groups[_key(default_title)] = {"title": default_title, "indices": leading, "records": None}
+        for group in groups.values():
+            if group["records"] is None:
+                start_records(group)
+        for group in groups.values():
+            checks = [c for c in (claims[i] for i in group["indices"]) if _disambiguates(c)]
+            if len(checks) > len(group["seen"]) and not agrees_with_claims(group["records"].result()[0][0], checks):
+                start_records(group)
+        return claims, [f.result() for f in futures]
+
+# Long answers: split into paragraph/sentence chunks, extract every chunk in parallel, group the
+# claims by the film they follow, and verify the film groups concurrently, so latency stays close
+# to one chunk's instead of growing with the size of a single extraction prompt.
+CHUNK_CHARS = 600
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+_chunk_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="extract-chunks")
+_group_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="verify-groups")
+
+def split_chunks(text, max_chars=CHUNK_CHARS):
+    """Pack paragraphs (sentences, for paragraphs over `max_chars`) into chunks of up to `max_chars`."""
+    units = []
+    for para in re.split(r"\n\s*\n", text):
+        para = para.strip()
+        if len(para) > max_chars:
+            units.extend(s.strip() for s in _SENTENCE_END.split(para) if s.strip())
+        elif para:
+            units.append(para)
+    chunks, current = [], ""
+    for unit in units:
+        if current and len(current) + len(unit) + 1 > max_chars:
+            chunks.append(current)
+            current = unit
+        else:
+            current = f"{current}\n{unit}" if current else unit
+    if current:
+        chunks.append(current)
+    return chunks
+
+def extract_claims_chunked(chunks):
+    """Claims per chunk, extracted concurrently."""
+    with span("extract_chunks", chunks=len(chunks)):
+        futures = [_chunk_pool.submit(contextvars.copy_context().run, extract_claims, c) for c in chunks]
+        return [f.result() for f in futures]
+
+def group_claims_by_film(chunk_claims, default_title=DEFAULT_TITLE):
+    """
+    [(title, indices into the flattened claims)] in order of first mention. Within a chunk, claims
+    belong to the latest title claim before them, or the chunk's first title if they precede it;
+    chunks without a title continue the previous chunk's film (default_title if none yet).
+    """
+    groups, current, leading = {}, None, []
+    i = 0
+    for claims in chunk_claims:
+        titles = [c["value"] for c in claims if c["attribute"].lower() == "title"]
+        for title in titles:
+            groups.setdefault(_key(title), (title, []))
+        if titles:
+            current = _key(titles[0])
+        for claim in claims:
+            if claim["attribute"].lower() == "title":
+                current = _key(claim["value"])
+            if current is None:
+                leading.append(i)
+            else:
+                groups[current][1].append(i)
+            i += 1
+    if leading:
+        if groups:
+            next(iter(groups.values()))[1][:0] = leading
+        else:
+            groups[_key(default_title)] = (default_title, leading)
+    return list(groups.values())
+
+def _verdict_key(title, year_hint, claim):
+    return (_key(title), year_hint, _key(claim["attribute"]), _key(claim["value"]))
+
+@traced()
+def verify_film_groups(chunk_claims, default_title=DEFAULT_TITLE, reuse=None, record=None):
+    """
+    verify_claims for each film the chunks mention, concurrently; results follow the flattened
+    claim order. Results found in `reuse` (by _verdict_key) are not re-checked; every result
+    that had source data is written to `record`.
+    """
+    claims = [c for chunk in chunk_claims for c in chunk]
+    jobs = []
+    for title, indices in group_claims_by_film(chunk_claims, default_title):
+        group = [claims[i] for i in indices]
+        year_hint = _year_hint(group)
+        keys = [_verdict_key(title, year_hint, c) for c in group]
+        known = {j: dict(reuse[k], claim=group[j]) for j, k in enumerate(keys) if reuse and k in reuse}
+        jobs.append((indices, keys, group, title, known))
+    if len(jobs) == 1:
+        outcomes = [verify_claims(*jobs[0][2:])]
+    else:
+        futures = [_group_pool.submit(contextvars.copy_context().run, verify_claims, *job[2:]) for job in jobs]
+        outcomes = [f.result() for f in futures]
+    results = [None] * len(claims)
+    for (indices, keys, *_), outcome in zip(jobs, outcomes):
+        for i, key, res in zip(indices, keys, outcome):
+            results[i] = res
+            if record is not None and res["sources_used"]:
+                record[key] = res
     return results
 
+# Incremental mode (/verify with a document_id): sentences are fingerprinted and only those the
+# document did not contain last time are extracted; a claim keeps its verdict while it is still
+# checked against the same film (title and year hint), so re-verifying a lightly edited long
+# document skips nearly all extraction and source work.
+DOCUMENTS = DocumentStore(max_documents=int(os.environ.get("DOCUMENT_STORE_SIZE", 1000)))
+
+def split_sentences(text):
+    return [s.strip() for para in re.split(r"\n\s*\n", text) for s in _SENTENCE_END.split(para) if s.strip()]
+
+@traced()
+def verify_document(document_id, text, claims=None, default_title=DEFAULT_TITLE):
+    """Returns (claims, results, stats). Given `claims` (from /answer) only the verdicts are reused."""
+    state = DOCUMENTS.get(document_id)
+    known_claims, known_verdicts = state.snapshot()
+    if claims is not None:
+        sentence_claims, chunk_claims = known_claims, [claims]
+        stats = {"sentences": 0, "extracted": 0}
+    else:
+        sentences = split_sentences(text)
+        fingerprints = [fingerprint(s) for s in sentences]
+        new = {fp: s for fp, s in zip(fingerprints, sentences) if fp not in known_claims}
+        extracted = dict(zip(new, extract_claims_chunked(list(new.values())))) if new else {}
+        sentence_claims = {fp: known_claims[fp] if fp in known_claims else extracted[fp] for fp in fingerprints}
+        chunk_claims = [sentence_claims[fp] for fp in fingerprints]
+        stats = {"sentences": len(sentences), "extracted": len(new)}
+        INCREMENTAL_SENTENCES.inc(len(sentences) - len(new), result="reused")
+        INCREMENTAL_SENTENCES.inc(len(new), result="extracted")
+
+    chunk_claims = [_resolve_references(chunk) for chunk in chunk_claims]
+    verdicts = {}
+    results = verify_film_groups(chunk_claims, default_title, reuse=known_verdicts, record=verdicts)
+    state.replace(sentence_claims, verdicts)
+    return [c for chunk in chunk_claims for c in chunk], results, stats
+
+def _verify_claim(claim, tmdb, omdb, wikidata):
+    attr, val = claim["attribute"].lower(), str(claim["value"]).lower()
+    verdicts = []
+    sources_used = set()
+
+    # --- TITLE ---
+    if attr == "title":
+        tmdb_title = tmdb.get("title", "").lower()
+        omdb_title = omdb.get("Title", "").lower()
+        wikidata_titles = [e["itemLabel"]["value"].lower() for e in wikidata if "itemLabel" in e]
+        matched = fuzzy_match(val, [tmdb_title, omdb_title] + wikidata_titles)
+        verdicts.append(matched)
+        if tmdb_title: sources_used.add("TMDB")
+        if omdb_title: sources_used.add("OMDB")
+        if wikidata_titles: sources_used.add("Wikidata")
+
+    # --- DIRECTOR / ACTOR ---
+    if attr in ["director", "actor"]:
+        val_lower = val.lower()
+        matched = False
+        if tmdb and "credits" in tmdb:
+            if attr == "director":
+                directors = [c["name"].lower() for c in tmdb["credits"]["crew"] if c.get("job","").lower()=="director"]
+                if val_lower in directors: matched = True
+            else:
+                actors = [c["name"].lower() for c in tmdb["credits"]["cast"]]
+                if val_lower in actors: matched = True
+            sources_used.add("TMDB")
+        if omdb:
+            key = "Director" if attr=="director" else "Actors"
+            if omdb.get(key):
+                names = [n.strip().lower() for n in omdb[key].split(",")]
+                if val_lower in names: matched = True
+            sources_used.add("OMDB")
+        if wikidata:
+            key = "directorLabel" if attr=="director" else "castLabel"
+            wd_names = [entry[key]["value"].lower() for entry in wikidata if key in entry]
+            if val_lower in wd_names: matched = True
+            sources_used.add("Wikidata")
+        verdicts.append(matched)
+
+    # --- RELEASE YEAR ---
+    if attr=="release_year":
+        if tmdb.get("release_date"): verdicts.append(val==extract_year(tmdb["release_date"]).lower()); sources_used.add("TMDB")
+        if omdb.get("Year"): verdicts.append(val==extract_year(omdb["Year"]).lower()); sources_used.add("OMDB")
+        if any(val==extract_year(entry.get("publicationDate", {}).get("value","")) for entry in wikidata if "publicationDate" in entry): verdicts.append(True); sources_used.add("Wikidata")
+
+    # --- BOX OFFICE ---
+    if attr=="box_office":
+        claim_val = parse_money(val)
+        matched = False
+        if tmdb.get("revenue"): tmdb_val=float(tmdb.get("revenue")); matched |= claim_val and abs(claim_val-tmdb_val)/tmdb_val<0.1; sources_used.add("TMDB")
+        if omdb.get("BoxOffice"): omdb_val=parse_money(omdb.get("BoxOffice")); matched |= claim_val and omdb_val and abs(claim_val-omdb_val)/omdb_val<0.1; sources_used.add("OMDB")
+        if wikidata:
+            for entry in wikidata:
+                if "boxOffice" in entry: wik_val=parse_money(entry["boxOffice"]["value"]); matched |= claim_val and wik_val and abs(claim_val-wik_val)/wik_val<0.1; sources_used.add("Wikidata")
+        verdicts.append(matched)
+
+    # --- GENRE / AWARD / RATING / RUNTIME / LANGUAGE / COUNTRY / PRODUCTION / FRANCHISE ---
+    if attr in ["genre","award","rating","runtime","language","country","production_company","franchise_info"]:
+        # TMDB
+        if attr=="genre" and "genres" in tmdb: verdicts.append(fuzzy_match(val,[g["name"] for g in tmdb["genres"]])); sources_used.add("TMDB")
+        if attr=="rating" and tmdb.get("vote_average"): verdicts.append(abs(float(tmdb["vote_average"])-float(val))<1); sources_used.add("TMDB")
+        if attr=="runtime" and tmdb.get("runtime"): verdicts.append(str(tmdb["runtime"]) in val or val in str(tmdb["runtime"])); sources_used.add("TMDB")
+        if attr=="franchise_info":
+            found=False
+            if tmdb.get("belongs_to_collection"):
+                coll_name = tmdb["belongs_to_collection"]["name"].lower()
+                if val in coll_name: verdicts.append(True); found=True
+            for entry in wikidata:
+                if "partOfLabel" in entry and val in entry["partOfLabel"]["value"].lower(): verdicts.append(True); found=True; sources_used.add("Wikidata")
+            if not found: verdicts.append(False)
+
+        # OMDB
+        if omdb:
+            if attr=="genre" and omdb.get("Genre"): verdicts.append(fuzzy_match(val,omdb["Genre"].split(","))); sources_used.add("OMDB")
+            if attr=="award" and omdb.get("Awards"): verdicts.append(fuzzy_match(val,[omdb["Awards"]])); sources_used.add("OMDB")
+            if attr=="production_company" and omdb.get("Production"): verdicts.append(fuzzy_match(val,[omdb["Production"]])); sources_used.add("OMDB")
+            if attr=="language" and omdb.get("Language"): verdicts.append(fuzzy_match(val,omdb["Language"].split(","))); sources_used.add("OMDB")
+            if attr=="country" and omdb.get("Country"): verdicts.append(fuzzy_match(val,omdb["Country"].split(","))); sources_used.add("OMDB")
+
+    # --- FINAL VERDICT ---
+    if not sources_used: status=" No Data Available"
+    elif all(verdicts): status=" Correct"
+    elif any(verdicts): status=" Mixed/Partial"
+    else: status="Incorrect"
+
+    return {"claim":claim,"status":status,"sources_used":list(sources_used)}
+
+def _resolve_references(claims):
+    session = current_session()
+    return claims if session is None else [session.resolve_reference(c) for c in claims]
+
+def run_verification(sentence, claims=None, stream=False, document_id=None):
+    """Extract claims (unless given, e.g. from /answer) and verify them; returns the /verify payload."""
+    incremental = None
+    session = current_session()
+    # in a chat session, claims that never name a film are about the one the conversation is on
+    default_title = (session.focus_title() if session else None) or DEFAULT_TITLE
+    with span("verify", chars=len(sentence), stream=stream, precomputed=claims is not None):
+        chunks = split_chunks(sentence) if claims is None and document_id is None else []
+        if document_id is not None:
+            if claims is not None:
+                claims = [c for c in claims if _valid_claim(c)]
+            claims, results, incremental = verify_document(document_id, sentence, claims, default_title)
+        elif claims is None and stream and len(chunks) <= 1:
+            claim_stream = extract_claims_stream(sentence)
+            if session is not None:
+                claim_stream = map(session.resolve_reference, claim_stream)
+            claims, results = verify_claims_streaming(claim_stream, default_title)
+        else:
+            if claims is not None:
+                chunk_claims = [[c for c in claims if _valid_claim(c)]]
+            elif len(chunks) > 1:
+                chunk_claims = extract_claims_chunked(chunks)
+            else:
+                chunk_claims = [extract_claims(sentence)]
+            chunk_claims = [_resolve_references(chunk) for chunk in chunk_claims]
+            claims = [c for chunk in chunk_claims for c in chunk]
+
+            results = verify_film_groups(chunk_claims, default_title)
+
+        if session is not None:
+            titles = [c["value"] for c in claims if c["attribute"].lower() == "title"]
+            if titles:
+                session.set_focus(_key(titles[-1]))
+
+    # make human-readable summary
+    summary_lines = []
+    for res in results:
+        claim = res["claim"]
+        summary_lines.append(
+            f"{claim['attribute']} = {claim['value']} → {res['status']} (sources: {', '.join(res['sources_used'])})"
+        )
+
+    payload = {
+        "claims": claims,
+        "results": results,
+        "summary": "\n".join(summary_lines)
+    }
+    if incremental is not None:
+        payload["incremental"] = incremental
+    return payload
+
+def _wants(data, flag):
+    return bool(data.get(flag)) or request.args.get(flag) in ("1", "true")
+
+# Chat sessions: pass the same "session_id" with every turn to /verify or /answer.
+SESSIONS = SessionStore(max_sessions=int(os.environ.get("SESSION_STORE_SIZE", 1000)),
+                        idle_ttl=float(os.environ.get("SESSION_IDLE_TTL", 1800)),
+                        max_films=int(os.environ.get("SESSION_MAX_FILMS", 20)))
+
+def _start_session(data):
+    session_id = data.get("session_id")
+    return use_session(SESSIONS.get(str(session_id)) if session_id else None)
+
 @app.route("/verify", methods=["POST"])
 def verify():
     data = request.get_json()
     sentence = data.get("sentence", "")
+    timings = start_timings()
+    _start_session(data)
 
     try:
-        claims = extract_claims(sentence)
-        title_claims = [c for c in claims if c["attribute"].lower() == "title"]
-        title = title_claims[0]["value"] if title_claims else "Avengers: Endgame"
-
-        results = verify_claims(claims, title)
-
-        # make human-readable summary
-        summary_lines = []
-        for res in results:
-            claim = res["claim"]
-            summary_lines.append(
-                f"{claim['attribute']} = {claim['value']} → {res['status']} (sources: {', '.join(res['sources_used'])})"
-            )
+        # "claims" from /answer skip the extraction call; a "document_id" re-verifies only what changed
+        payload = run_verification(sentence, claims=data.get("claims"), stream=_wants(data, "stream"),
+                                   document_id=data.get("document_id"))
+        if _wants(data, "timings"):
+            payload["timings"] = timings
+        return jsonify(payload)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        return jsonify({
-            "claims": claims,
-            "results": results,
-            "summary": "\n".join(summary_lines)
-        })
+@app.route("/answer", methods=["POST"])
+def answer():
+    data = request.get_json() or {}
+    question = data.get("question", "")
+    timings = start_timings()
+    _start_session(data)
 
+    try:
+        text, claims = generate_answer_with_claims(question)
+        payload = {"answer": text, "claims": claims}
+        if _wants(data, "verify"):
+            # claims is None if the structured response failed to decode; extract from the text then
+            payload["verification"] = run_verification(text, claims=claims)
+        if _wants(data, "timings"):
+            payload["timings"] = timings
+        return jsonify(payload)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/session/<session_id>", methods=["GET", "DELETE"])
+def session_context(session_id):
+    if request.method == "DELETE":
+        return jsonify({"dropped": SESSIONS.drop(session_id)})
+    session = SESSIONS.get(session_id, create=False)
+    if session is None:
+        return jsonify({"error": "unknown or expired session"}), 404
+    return jsonify(session.describe())
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/prefetch", methods=["POST"])
+def prefetch():
+    data = request.get_json() or {}
+    titles = [(t, None) if isinstance(t, str) else (t.get("title"), t.get("year")) for t in data.get("titles", [])]
+    try:
+        for kind in ("trending", "popular"):
+            if data.get(kind):
+                titles.extend(tmdb_list_titles(kind, pages=int(data.get("pages", 1))))
+        workers = min(int(data.get("workers", PREFETCH_WORKERS)), 16)
+        results = prefetch_titles([t for t in titles if t[0]], max_workers=workers)
+        return jsonify({"prefetched": len(results), "results": results})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -0,0 +1,125 @@
+"""
+Per-conversation entity context for multi-turn chat verification
+- A session remembers the films its turns resolved, with their fetched (tmdb, omdb, wikidata)
+  records and key people, plus the film the conversation is currently about. Follow-up turns
+  that leave the film implicit, or say "its director", resolve against it without new
+  upstream calls.
+- Bounded: at most `max_films` films per session (least recently used dropped first) and
+  `max_sessions` sessions; a session idle for more than `idle_ttl` seconds is discarded.
+- `use_session` binds a session to the current request; worker threads see it through
+  contextvars.copy_context, like the per-request timings.
+"""
+
+import re
+import time
+import threading
+import contextvars
+from collections import OrderedDict
+
+_current = contextvars.ContextVar("verifier_session", default=None)
+
+# "its director", "the film's star", "the lead actress", "he" ...
+PERSON_REFERENCE_RE = re.compile(
+    r"^(?:(?:its|the|that|this)(?: (?:film|movie)'s)? (director|star|lead(?: actor| actress)?)|he|she|they|him|her|them)$",
+    re.I)
+
+
+def current_session():
+    return _current.get()
+
+
+def use_session(session):
+    """Bind `session` (or None) to the current request."""
+    _current.set(session)
+    return session
+
+
+class SessionContext:
+    def __init__(self, max_films=20):
+        self.max_films = max_films
+        self.films = OrderedDict()  # film key -> {"title", "year", "records", "people"}
+        self.focus = None           # key of the film the conversation is about
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+
+    def film(self, key, year=None):
+        """The remembered film, if its year (when one is asked for) matches."""
+        with self.lock:
+            film = self.films.get(key)
+            if film is None or (year is not None and film["year"] not in (None, year)):
+                return None
+            self.films.move_to_end(key)
+            return film
+
+    def remember(self, key, title, year, records, people):
+        with self.lock:
+            self.films[key] = {"title": title, "year": year, "records": records, "people": people}
+            self.films.move_to_end(key)
+            while len(self.films) > self.max_films:
+                dropped, _ = self.films.popitem(last=False)
+                if dropped == self.focus:
+                    self.focus = None
+
+    def set_focus(self, key):
+        with self.lock:
+            self.focus = key
+
+    def focus_title(self):
+        with self.lock:
+            film = self.films.get(self.focus)
+            return film["title"] if film else None
+
+    def resolve_reference(self, claim):
+        """A person claim whose value refers back ("its director") gets the focus film's person."""
+        if claim.get("attribute", "").lower() not in ("director", "actor"):
+            return claim
+        match = PERSON_REFERENCE_RE.match(str(claim.get("value", "")).strip())
+        with self.lock:
+            film = self.films.get(self.focus)
+        if match is None or film is None:
+            return claim
+        role = "director" if (match.group(1) or claim["attribute"]).lower() == "director" else "actor"
+        name = film["people"].get(role)
+        return dict(claim, value=name, reference=claim["value"]) if name else claim
+
+    def describe(self):
+        with self.lock:
+            return {"focus": self.films[self.focus]["title"] if self.focus in self.films else None,
+                    "films": [{"title": f["title"], "year": f["year"], "people": f["people"]} for f in self.films.values()]}
+
+
+class SessionStore:
+    def __init__(self, max_sessions=1000, idle_ttl=1800, max_films=20):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_films = max_films
+        self._sessions = OrderedDict()  # least recently used first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _expire(self, now):
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_used <= self.idle_ttl and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+
+    def get(self, session_id, create=True):
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                if not create:
+                    return None
+                session = self._sessions[session_id] = SessionContext(self.max_films)
+                self._expire(now)
+            self._sessions.move_to_end(session_id)
+            session.last_used = now
+            return session
+
+    def drop(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
@@ -0,0 +1,151 @@
+"""
+In-process fuzzy title index
+- Character trigram inverted index over normalized titles (plus alternate titles),
+  so misspelled LLM titles ("Avenger Endgame") resolve without a network search.
+- Candidates are blocked on the rarest trigrams of the query, then rescored with rapidfuzz.
+- `search(..., same_numbers=True)` only matches titles with the same number tokens (digits
+  or roman numerals), so "Titanic 2" never scores as a near-exact "Titanic".
+- Load a catalog with `load_jsonl` (TMDb daily export or our own dump); entries
+  seen in live TMDb search results are added as they arrive.
+
+Catalog lines (JSON, optionally gzipped):
+    {"id": 299534, "title": "Avengers: Endgame", "original_title": "...", "release_date": "2019-04-24",
+     "popularity": 97.4, "alternative_titles": ["Avengers 4"]}
+"""
+
+import re
+import gzip
+import json
+import threading
+import unicodedata
+from collections import Counter
+
+from rapidfuzz import fuzz
+
+
+def normalize_title(text):
+    text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode()
+    text = re.sub(r"[^a-z0-9]+", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+# Roman numerals up to 39: sequel numbers, not words like "mix" or "civil".
+ROMAN_RE = re.compile(r"^(x{0,3})(ix|iv|v?i{0,3})$")
+ROMAN_VALUES = {"i": 1, "v": 5, "x": 10}
+
+
+def _roman(token):
+    total = 0
+    for a, b in zip(token, token[1:] + " "):
+        v = ROMAN_VALUES[a]
+        total += -v if ROMAN_VALUES.get(b, 0) > v else v
+    return total
+
+
+def number_tokens(norm):
+    """Numbers in a normalized title, roman numerals as ints: "rocky ii" -> {2}, "1917" -> {1917}."""
+    numbers = set()
+    for token in norm.split():
+        if token.isdigit():
+            numbers.add(int(token))
+        elif token and ROMAN_RE.match(token):
+            numbers.add(_roman(token))
+    return numbers
+
+
+def trigrams(norm):
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    def __init__(self, max_posting=5000, block_grams=6, block_candidates=32):
+        self.max_posting = max_posting        # grams more common than this don't block
+        self.block_grams = block_grams        # rarest query grams used to gather candidates
+        self.block_candidates = block_candidates
+        self._docs = []       # doc -> {"id", "title", "year", "popularity"}
+        self._doc_by_id = {}
+        self._entries = []    # entry -> (normalized text, doc)
+        self._seen = set()
+        self._postings = {}   # trigram -> [entry, ...]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, tmdb_id, title, year=None, popularity=0.0, alternative_titles=()):
+        if not tmdb_id or not title:
+            return
+        with self._lock:
+            doc = self._doc_by_id.get(tmdb_id)
+            if doc is None:
+                doc = len(self._docs)
+                self._docs.append({"id": tmdb_id, "title": title, "year": year, "popularity": popularity or 0.0})
+                self._doc_by_id[tmdb_id] = doc
+            elif year and not self._docs[doc]["year"]:
+                self._docs[doc]["year"] = year
+            for name in (title, *alternative_titles):
+                norm = normalize_title(name)
+                if not norm or (norm, doc) in self._seen:
+                    continue
+                self._seen.add((norm, doc))
+                entry = len(self._entries)
+                self._entries.append((norm, doc))
+                for g in trigrams(norm):
+                    self._postings.setdefault(g, []).append(entry)
+
+    def add_tmdb_results(self, results):
+        for m in results or []:
+            year = (m.get("release_date") or "")[:4]
+            alts = [m["original_title"]] if m.get("original_title") and m.get("original_title") != m.get("title") else []
+            self.add(m.get("id"), m.get("title"), int(year) if year.isdigit() else None, m.get("popularity"), alts)
+
+    def search(self, title, year=None, k=5, same_numbers=False):
+        """Top-k {"id", "title", "year", "score"} for `title`, best first."""
+        norm = normalize_title(title)
+        if not norm:
+            return []
+        numbers = number_tokens(norm) if same_numbers else None
+        postings = [p for p in (self._postings.get(g) for g in trigrams(norm)) if p and len(p) <= self.max_posting]
+        postings.sort(key=len)
+        counts = Counter()
+        for p in postings[:self.block_grams]:
+            counts.update(p)
+
+        best = {}
+        for entry, _ in counts.most_common(self.block_candidates):
+            text, doc = self._entries[entry]
+            if numbers is not None and number_tokens(text) != numbers:
+                continue
+            score = fuzz.token_set_ratio(norm, text) * 0.5 + fuzz.ratio(norm, text) * 0.5
+            d = self._docs[doc]
+            if year and d["year"]:
+                score -= min(abs(d["year"] - year), 5) * 2
+            if score > best.get(doc, -1):
+                best[doc] = score
+
+        ranked = sorted(best.items(), key=lambda x: (-x[1], -self._docs[x[0]]["popularity"]))[:k]
+        return [{**{f: self._docs[doc][f] for f in ("id", "title", "year")}, "score": round(score, 1)}
+                for doc, score in ranked]
+
+    def best(self, title, year=None, threshold=90):
+        hits = self.search(title, year, k=1)
+        return hits[0] if hits and hits[0]["score"] >= threshold else None
+
+    def load_jsonl(self, path):
+        opener = gzip.open if path.endswith(".gz") else open
+        n = 0
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                m = json.loads(line)
+                title = m.get("title") or m.get("original_title")
+                alts = list(m.get("alternative_titles") or [])
+                if m.get("original_title") and m.get("original_title") != title:
+                    alts.append(m["original_title"])
+                year = m.get("year") or (m.get("release_date") or "")[:4]
+                self.add(m.get("id"), title, int(year) if str(year).isdigit() else None, m.get("popularity"), alts)
+                n += 1
+        return n
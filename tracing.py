@@ -0,0 +1,149 @@
+"""
+Minimal request tracing (OpenTelemetry-style spans, no SDK required)
+- `span(name, **attrs)` opens a child of the current span (or a new trace at the root);
+  `traced(name)` does the same for a whole function.
+- When the root span ends, the whole trace is handed to the configured exporters.
+- Exporters are picked from TRACE_EXPORTER:
+    console         -> print a per-request waterfall to stdout
+    file:<path>     -> append one JSON object per span to <path>
+  Several can be combined with commas. Unset = tracing disabled (spans are no-ops).
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("trace_span", default=None)
+_exporters = []
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "depth", "attributes",
+                 "status", "start", "end", "_t0", "_trace")
+
+    def __init__(self, name, parent, attributes):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.depth = parent.depth + 1 if parent else 0
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.start = time.time()
+        self.end = None
+        self._t0 = time.perf_counter()
+        self._trace = parent._trace if parent else []
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self):
+        return round((self.end - self.start) * 1000.0, 2) if self.end else None
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def current_span():
+    return _current.get()
+
+
+@contextmanager
+def span(name, **attributes):
+    if not _exporters:
+        yield None
+        return
+    parent = _current.get()
+    s = Span(name, parent, attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except Exception as e:
+        s.status = "error"
+        s.attributes["error"] = repr(e)
+        raise
+    finally:
+        s.end = s.start + (time.perf_counter() - s._t0)
+        _current.reset(token)
+        s._trace.append(s)
+        if parent is None:
+            _export(s._trace)
+
+
+def traced(name=None):
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---------------------------
+# Exporters
+# ---------------------------
+class ConsoleExporter:
+    def export(self, spans):
+        spans = sorted(spans, key=lambda s: s.start)
+        root_start = spans[0].start
+        lines = [f"trace {spans[0].trace_id}"]
+        for s in spans:
+            offset = (s.start - root_start) * 1000.0
+            attrs = " ".join(f"{k}={v}" for k, v in s.attributes.items())
+            flag = "" if s.status == "ok" else " !"
+            lines.append(f"  {offset:9.1f}ms {s.duration_ms:9.1f}ms {'  ' * s.depth}{s.name}{flag} {attrs}".rstrip())
+        print("\n".join(lines))
+
+
+class FileExporter:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            for s in spans:
+                f.write(json.dumps(s.to_dict(), default=str) + "\n")
+
+
+def _export(spans):
+    for exporter in list(_exporters):
+        try:
+            exporter.export(spans)
+        except Exception as e:
+            print("Trace export error:", e)
+
+
+def configure(spec=None):
+    """(Re)configure exporters from a TRACE_EXPORTER-style spec; returns the active exporters."""
+    _exporters.clear()
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if part == "console":
+            _exporters.append(ConsoleExporter())
+        elif part.startswith("file:"):
+            _exporters.append(FileExporter(part[len("file:"):]))
+        elif part:
+            print(f"Unknown trace exporter '{part}' (expected 'console' or 'file:<path>')")
+    return list(_exporters)
+
+
+configure(os.environ.get("TRACE_EXPORTER"))
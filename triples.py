@@ -0,0 +1,235 @@
+"""
+Batched (subject, verb, object) triple extraction (module form of split_claims.ipynb)
+- Parses texts in batches: spaCy `nlp.pipe` (batch_size, n_process) or stanza bulk
+  processing (one pipeline call per list of stanza.Document).
+- Each parsed sentence is reduced to words/heads/deprels once; its children lists are built
+  in one pass and subtrees are memoized per node, instead of the notebook's repeated
+  `get_subtree_ids` scans over `sent.words`.
+- `iter_triples` is a generator: give it a file or any lazy iterable of texts and it yields
+  (text, triples) as batches finish, without holding the corpus in memory.
+
+Stream a corpus to JSON lines:
+    python triples.py extract --file corpus.txt --out triples.jsonl --n-process 4
+Benchmark against the notebook's per-sentence path:
+    python triples.py bench --n 100000 --backend spacy --n-process 4
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from itertools import islice
+
+SPACY_MODEL = os.environ.get("TRIPLES_SPACY_MODEL", "en_core_web_sm")
+BATCH_SIZE = 256
+
+# spaCy (ClearNLP) and stanza (UD) labels for the same roles
+SUBJ_DEPS = {"nsubj", "nsubj:pass", "nsubjpass"}
+OBJ_DEPS = {"obj", "dobj", "iobj", "attr"}
+
+
+def _is_obl(dep):
+    return dep.startswith("obl") or dep in ("prep", "agent")
+
+
+class ParsedSentence:
+    """Words, head indices (-1 = root) and deprels of one sentence, with a children index."""
+
+    __slots__ = ("words", "heads", "deps", "children", "_subtrees")
+
+    def __init__(self, words, heads, deps):
+        self.words, self.heads, self.deps = words, heads, deps
+        self.children = [[] for _ in words]
+        for i, head in enumerate(heads):
+            if head >= 0:
+                self.children[head].append(i)
+        self._subtrees = [None] * len(words)
+
+    def subtree(self, i):
+        """Indices of `i` and all its descendants, in sentence order."""
+        ids = self._subtrees[i]
+        if ids is None:
+            ids, stack = [], [i]
+            while stack:
+                node = stack.pop()
+                ids.append(node)
+                stack.extend(self.children[node])
+            ids.sort()
+            self._subtrees[i] = ids
+        return ids
+
+    def phrase(self, i, skip=()):
+        """Text of the subtree under `i`, leaving out the subtrees under `skip`."""
+        dropped = {j for s in skip for j in self.subtree(s)}
+        return " ".join(self.words[j] for j in self.subtree(i) if j not in dropped)
+
+
+def triples_from_sentence(sent):
+    triples = []
+    for verb, dep in enumerate(sent.deps):
+        if dep.lower() != "root":
+            continue
+        verb_text = sent.words[verb]
+        kids = sent.children[verb]
+        subjects = [c for c in kids if sent.deps[c] in SUBJ_DEPS]
+        objects = [c for c in kids if sent.deps[c] in OBJ_DEPS]
+        for subj in subjects:
+            subj_phrase = sent.phrase(subj)
+            for obj in objects:
+                # main object words only; its prepositional children become their own triples
+                obls = [c for c in sent.children[obj] if _is_obl(sent.deps[c])]
+                triples.append((subj_phrase, verb_text, sent.phrase(obj, skip=obls)))
+                triples.extend((subj_phrase, verb_text, sent.phrase(c)) for c in obls)
+            if not objects:
+                triples.extend((subj_phrase, verb_text, sent.phrase(c)) for c in kids if _is_obl(sent.deps[c]))
+    return triples
+
+
+# ---------------------------
+# Backends
+# ---------------------------
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+
+def load_pipeline(backend="spacy"):
+    with _pipelines_lock:
+        if backend not in _pipelines:
+            if backend == "spacy":
+                import spacy
+                _pipelines[backend] = spacy.load(SPACY_MODEL, disable=["ner", "lemmatizer"])
+            elif backend == "stanza":
+                import stanza
+                _pipelines[backend] = stanza.Pipeline("en", processors="tokenize,pos,lemma,depparse", use_gpu=False)
+            else:
+                raise ValueError(f"unknown backend {backend!r}")
+        return _pipelines[backend]
+
+
+def _spacy_sentences(doc, sentence_cls=ParsedSentence):
+    for sent in doc.sents:
+        start = sent.start
+        yield sentence_cls([t.text for t in sent],
+                           [-1 if t.head.i == t.i else t.head.i - start for t in sent],
+                           [t.dep_ for t in sent])
+
+
+def _stanza_sentences(doc, sentence_cls=ParsedSentence):
+    for sent in doc.sentences:
+        yield sentence_cls([w.text for w in sent.words], [w.head - 1 for w in sent.words],
+                           [w.deprel for w in sent.words])
+
+
+def _doc_triples(doc, backend, sentence_cls=ParsedSentence):
+    sentences = _spacy_sentences(doc, sentence_cls) if backend == "spacy" else _stanza_sentences(doc, sentence_cls)
+    return [t for sent in sentences for t in triples_from_sentence(sent)]
+
+
+def _batches(iterable, size):
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_triples(texts, backend="spacy", batch_size=BATCH_SIZE, n_process=1):
+    """Yield (text, triples) for every text, in input order, parsing `batch_size` texts at a time."""
+    nlp = load_pipeline(backend)
+    if backend == "spacy":
+        for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+            yield doc.text, _doc_triples(doc, backend)
+        return
+    import stanza
+    for batch in _batches(texts, batch_size):
+        for text, doc in zip(batch, nlp([stanza.Document([], text=t) for t in batch])):
+            yield text, _doc_triples(doc, backend)
+
+
+def extract_triples(text, backend="spacy"):
+    return next(iter_triples([text], backend, batch_size=1))[1]
+
+
+# ---------------------------
+# Benchmark
+# ---------------------------
+class _ScanSentence(ParsedSentence):
+    """The notebook's get_subtree_ids: rescan every word until no new descendant is added."""
+
+    def subtree(self, i):
+        ids = [i]
+        added = True
+        while added:
+            added = False
+            for w, head in enumerate(self.heads):
+                if head in ids and w not in ids:
+                    ids.append(w)
+                    added = True
+        return sorted(ids)
+
+
+def _triples_unbatched(texts, backend):
+    nlp = load_pipeline(backend)
+    return [_doc_triples(nlp(text), backend, _ScanSentence) for text in texts]
+
+
+SAMPLE_SENTENCES = [
+    "Leonardo DiCaprio won an Oscar for The Revenant in 2016.",
+    "Inception was directed by Christopher Nolan and stars Leonardo DiCaprio and Elliot Page.",
+    "Avengers: Endgame grossed nearly $2.8 billion at the worldwide box office.",
+    "Bong Joon-ho directed Parasite, which won the Palme d'Or before its Academy Award for Best Picture.",
+    "The Dark Knight, the second film in Nolan's trilogy, was released by Warner Bros. in July 2008.",
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batched dependency-parse triple extraction.")
+    parser.add_argument("--backend", choices=("spacy", "stanza"), default="spacy")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--n-process", type=int, default=1, help="spaCy worker processes")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("extract", help="stream triples for each line of a file as JSON lines")
+    ex.add_argument("--file", required=True)
+    ex.add_argument("--out", help="default: stdout")
+    bench = sub.add_parser("bench", help="sentences/sec, per-sentence vs batched")
+    bench.add_argument("--file", help="one sentence per line (default: built-in samples)")
+    bench.add_argument("--n", type=int, default=100000)
+    bench.add_argument("--baseline-n", type=int, default=None, help="sentences for the per-sentence path (default: --n)")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "extract":
+        out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+        with open(args.file, encoding="utf-8") as f:
+            lines = (l.strip() for l in f)
+            for text, triples in iter_triples((l for l in lines if l), args.backend, args.batch_size, args.n_process):
+                out.write(json.dumps({"text": text, "triples": triples}) + "\n")
+        if args.out:
+            out.close()
+        return 0
+
+    pool = SAMPLE_SENTENCES
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            pool = [l.strip() for l in f if l.strip()]
+    sentences = (pool * (args.n // len(pool) + 1))[:args.n]
+    baseline = sentences[:args.baseline_n or args.n]
+    load_pipeline(args.backend)
+
+    start = time.perf_counter()
+    expected = _triples_unbatched(baseline, args.backend)
+    unbatched = len(baseline) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    got = [triples for _, triples in iter_triples(sentences, args.backend, args.batch_size, args.n_process)]
+    batched = len(sentences) / (time.perf_counter() - start)
+
+    print(f"per-sentence nlp() + subtree scans: {unbatched:8.1f} sentences/sec ({len(baseline)} sentences)")
+    print(f"batched (batch {args.batch_size}, n_process {args.n_process}): {batched:8.1f} sentences/sec ({len(sentences)} sentences)")
+    print("outputs identical:", got[:len(expected)] == expected)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
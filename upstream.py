@@ -0,0 +1,258 @@
+"""
+Shared HTTP layer for TMDb / OMDb / Wikidata calls
+- `robust_get` retries with exponential backoff and records per-source metrics
+  (attempt latency, status codes, errors, retries, 429s).
+- Every attempt gets its own trace span, so retries show up in the waterfall.
+- A per-source circuit breaker stops calling a source after repeated failures
+  and lets a single probe through once `reset_timeout` has passed.
+- Idempotent GETs to sources in HEDGED_SOURCES are hedged: if the first request
+  hasn't answered by the source's recent p95 latency, a duplicate is sent and
+  whichever answers first wins.
+- Inside `conditional(validators)`, requests carry If-None-Match / If-Modified-Since
+  from the validators dict, fresh ETag / Last-Modified values are written back into it,
+  and a 304 raises NotModified so the caller keeps what it already has.
+"""
+
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+from metrics import (UPSTREAM_LATENCY, UPSTREAM_REQUESTS, UPSTREAM_ERRORS, UPSTREAM_RETRIES, UPSTREAM_RATE_LIMITED,
+                     CIRCUIT_TRIPS, CIRCUIT_REJECTED, HEDGED_REQUESTS, CONDITIONAL_REQUESTS)
+from tracing import span
+
+# ---------------------------
+# CONFIG
+# ---------------------------
+BREAKER_FAILURE_THRESHOLD = 5     # consecutive failures before opening
+BREAKER_RESET_TIMEOUT = 30.0      # seconds open before a half-open probe
+HEDGED_SOURCES = {"wikidata"}     # long-tail SPARQL latency
+HEDGE_MIN_SAMPLES = 20            # need this many latencies before trusting the p95
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_DELAY = 0.05            # never hedge sooner than this (seconds)
+
+_hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="upstream-hedge")
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling a source whose breaker is open."""
+
+
+class NotModified(Exception):
+    """A conditional request got 304: the caller's copy is still current."""
+    stage_error = False   # an outcome, not a failure: `timed` doesn't count it
+
+
+# ---------------------------
+# Conditional requests
+# ---------------------------
+_validators = contextvars.ContextVar("upstream_validators", default=None)
+
+
+@contextmanager
+def conditional(validators):
+    """Revalidate GETs in this block against `validators` ({"etag", "last_modified"}), updating it in place."""
+    token = _validators.set(validators)
+    try:
+        yield validators
+    finally:
+        _validators.reset(token)
+
+
+def _conditional_headers(headers, validators):
+    headers = dict(headers or {})
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def _store_validators(resp, validators, source, revalidating):
+    if resp.status_code == 304:
+        CONDITIONAL_REQUESTS.inc(source=source, result="not_modified")
+        raise NotModified(resp.url)
+    if revalidating:
+        CONDITIONAL_REQUESTS.inc(source=source, result="modified")
+    validators.clear()
+    if resp.headers.get("ETag"):
+        validators["etag"] = resp.headers["ETag"]
+    if resp.headers.get("Last-Modified"):
+        validators["last_modified"] = resp.headers["Last-Modified"]
+
+
+# ---------------------------
+# Circuit breaker
+# ---------------------------
+class CircuitBreaker:
+    def __init__(self, source, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.source = source
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._probe_in_flight = False
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = time.time()
+                self._probe_in_flight = False
+                CIRCUIT_TRIPS.inc(source=self.source)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(source):
+    with _breakers_lock:
+        breaker = _breakers.get(source)
+        if breaker is None:
+            breaker = _breakers[source] = CircuitBreaker(source)
+        return breaker
+
+
+def _is_source_failure(exc):
+    # Timeouts, connection errors, 5xx and 429 say the source is unhealthy; other 4xx don't.
+    resp = getattr(exc, "response", None)
+    return resp is None or resp.status_code >= 500 or resp.status_code == 429
+
+
+# ---------------------------
+# Latency tracking for hedging
+# ---------------------------
+_latencies = {}
+_latencies_lock = threading.Lock()
+
+
+def _record_latency(source, seconds):
+    with _latencies_lock:
+        _latencies.setdefault(source, deque(maxlen=200)).append(seconds)
+
+
+def hedge_delay(source):
+    """Recent p95 latency for `source`, or None until enough samples exist."""
+    with _latencies_lock:
+        samples = sorted(_latencies.get(source, ()))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    return max(samples[int(HEDGE_PERCENTILE * (len(samples) - 1))], HEDGE_MIN_DELAY)
+
+
+# ---------------------------
+# Single attempt
+# ---------------------------
+def _get_once(url, params, headers, timeout, source, attempt, hedge=False):
+    start = time.perf_counter()
+    try:
+        with span("http.get", source=source, attempt=attempt, hedge=hedge) as s:
+            resp = requests.get(url, params=params or {}, headers=headers or {}, timeout=timeout)
+            elapsed = time.perf_counter() - start
+            UPSTREAM_LATENCY.observe(elapsed, source=source)
+            UPSTREAM_REQUESTS.inc(source=source, status=str(resp.status_code))
+            if s:
+                s.set_attribute("status", resp.status_code)
+            if resp.status_code == 429:
+                UPSTREAM_RATE_LIMITED.inc(source=source)
+            resp.raise_for_status()
+        _record_latency(source, elapsed)
+        return resp
+    except requests.exceptions.RequestException as e:
+        if getattr(e, "response", None) is None:
+            # network error / timeout: no response was observed above
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, source=source)
+        raise
+
+
+def _hedged_get(url, params, headers, timeout, source, attempt):
+    delay = hedge_delay(source)
+    if delay is None:
+        return _get_once(url, params, headers, timeout, source, attempt)
+    primary = _hedge_pool.submit(contextvars.copy_context().run, _get_once, url, params, headers, timeout, source, attempt)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+
+    HEDGED_REQUESTS.inc(source=source, result="sent")
+    backup = _hedge_pool.submit(contextvars.copy_context().run, _get_once, url, params, headers, timeout, source, attempt, True)
+    pending = {primary, backup}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            try:
+                resp = fut.result()
+            except requests.exceptions.RequestException as e:
+                error = e
+                continue
+            if fut is backup:
+                HEDGED_REQUESTS.inc(source=source, result="won")
+            return resp
+    raise error
+
+
+# ---------------------------
+# Robust GET with retries
+# ---------------------------
+def robust_get(url, params=None, headers=None, timeout=10, retries=3, backoff=0.6, source="other", hedge=None):
+    breaker = get_breaker(source)
+    if hedge is None:
+        hedge = source in HEDGED_SOURCES
+    validators = _validators.get()
+    revalidating = bool(validators and (validators.get("etag") or validators.get("last_modified")))
+    if revalidating:
+        headers = _conditional_headers(headers, validators)
+    attempt = 0
+    while attempt < retries:
+        if not breaker.allow():
+            CIRCUIT_REJECTED.inc(source=source)
+            raise CircuitOpenError(f"{source} circuit breaker is open")
+        try:
+            if hedge:
+                resp = _hedged_get(url, params, headers, timeout, source, attempt + 1)
+            else:
+                resp = _get_once(url, params, headers, timeout, source, attempt + 1)
+            breaker.record_success()
+        except requests.exceptions.RequestException as e:
+            if _is_source_failure(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            UPSTREAM_ERRORS.inc(source=source)
+            attempt += 1
+            if attempt >= retries:
+                raise
+            UPSTREAM_RETRIES.inc(source=source)
+            time.sleep(backoff * (2 ** (attempt - 1)))
+            continue
+        if validators is not None:
+            _store_validators(resp, validators, source, revalidating)
+        return resp
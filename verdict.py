@@ -10,6 +10,13 @@ import requests
 from rapidfuzz import process, fuzz
 import json
 import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from batching import SingleFlight
+from title_index import normalize_title
+from verdict_common import (PERSON_INDEX, OSCAR_INDEX, person_filmography, verify_in_filmography,
+                            claim_person, plan_person_centric, label_qid_loaders)
 
 # ---------------------------
 # CONFIG
@@ -20,9 +27,30 @@ OMDB_API_KEY = "a6f7938d"   # <-- replace if you want OMDb fallback
 WIKIDATA_SPARQL = "https://query.wikidata.org/sparql"
 USER_AGENT = "MovieFactChecker/1.0 (contact: you@example.com)"  # change if you want
 
+# Claims of one sentence are verified concurrently; identical lookups in flight at the
+# same time (same person, same film) are made once and shared.
+CLAIM_WORKERS = 4
+SENTENCE_DEADLINE = 20.0   # seconds for all claims of a sentence
+IN_FLIGHT = SingleFlight()
+
+# A sentence's deadline is carried to its claim workers, and every HTTP call below caps its
+# timeout at what is left of it, so a claim that runs out of time frees its worker instead of
+# holding it (and delaying the next sentence's claims) for a full upstream timeout.
+_deadline = contextvars.ContextVar("claim_deadline", default=None)
+
+def _budget(timeout):
+    deadline = _deadline.get()
+    if deadline is None:
+        return timeout
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise requests.exceptions.Timeout("sentence deadline passed")
+    return min(timeout, left)
+
 # ---------------------------
 # NETWORK / TMDB helpers (Bearer token)
 # ---------------------------
+@IN_FLIGHT.shared
 def tmdb_get(path, params=None, timeout=10):
     base = "https://api.themoviedb.org/3"
     url = base.rstrip("/") + "/" + path.lstrip("/")
@@ -32,7 +60,7 @@ def tmdb_get(path, params=None, timeout=10):
         "User-Agent": USER_AGENT
     }
     try:
-        resp = requests.get(url, headers=headers, params=params or {}, timeout=timeout)
+        resp = requests.get(url, headers=headers, params=params or {}, timeout=_budget(timeout))
         resp.raise_for_status()
         return resp.json()
     except requests.exceptions.RequestException as e:
@@ -64,9 +92,15 @@ def tmdb_movie_credits(movie_id):
         return None
     return tmdb_get(f"/movie/{movie_id}/credits")
 
+def tmdb_person_movie_credits(person_id):
+    if not person_id:
+        return None
+    return tmdb_get(f"/person/{person_id}/movie_credits")
+
 # ---------------------------
 # OMDb helper (fallback)
 # ---------------------------
+@IN_FLIGHT.shared
 def omdb_lookup_title(title, year=None):
     if not OMDB_API_KEY or OMDB_API_KEY.startswith("YOUR_OMDB"):
         return None
@@ -74,7 +108,7 @@ def omdb_lookup_title(title, year=None):
     if year:
         params["y"] = str(year)
     try:
-        r = requests.get("https://www.omdbapi.com/", params=params, timeout=8)
+        r = requests.get("https://www.omdbapi.com/", params=params, timeout=_budget(8))
         r.raise_for_status()
         data = r.json()
         return data if data.get("Response") == "True" else None
@@ -85,21 +119,21 @@ def omdb_lookup_title(title, year=None):
 # ---------------------------
 # Wikidata helpers (SPARQL) - for Oscars / Academy Awards verification
 # ---------------------------
+def wikidata_query(query, timeout=10):
+    r = requests.get(WIKIDATA_SPARQL, params={"query": query, "format": "json"},
+                     headers={"User-Agent": USER_AGENT}, timeout=_budget(timeout))
+    r.raise_for_status()
+    return r.json()
+
+# Exact-label lookups of a sentence's claims run concurrently, so they share batched queries.
+PERSON_QID_LOADER, FILM_QID_LOADER = label_qid_loaders(wikidata_query)
+
+@IN_FLIGHT.shared
 def wikidata_person_qid(person_name):
     """Try to find a Wikidata QID for the person by label (best-effort)."""
-    q = """
-    SELECT ?person WHERE {
-      ?person rdfs:label "%s"@en.
-      ?person wdt:P31 wd:Q5.
-    } LIMIT 5
-    """ % person_name.replace('"', '\\"')
     try:
-        r = requests.get(WIKIDATA_SPARQL, params={"query": q, "format": "json"},
-                         headers={"User-Agent": USER_AGENT}, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        bindings = data.get("results", {}).get("bindings", [])
-        if not bindings:
+        qid = PERSON_QID_LOADER.load(person_name)
+        if not qid:
             # try search by alias (more flexible)
             q2 = """
             SELECT ?person ?personLabel WHERE {
@@ -109,35 +143,22 @@ def wikidata_person_qid(person_name):
               SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
             } LIMIT 10
             """ % person_name.replace('"', '\\"')
-            r2 = requests.get(WIKIDATA_SPARQL, params={"query": q2, "format": "json"},
-                              headers={"User-Agent": USER_AGENT}, timeout=10)
-            r2.raise_for_status()
-            data2 = r2.json()
-            bs = data2.get("results", {}).get("bindings", [])
+            bs = wikidata_query(q2).get("results", {}).get("bindings", [])
             if not bs:
                 return None
             # pick first
             return bs[0]["person"]["value"].split("/")[-1]
-        return bindings[0]["person"]["value"].split("/")[-1]
+        return qid
     except Exception as e:
         print("Wikidata person lookup error:", e)
         return None
 
+@IN_FLIGHT.shared
 def wikidata_film_qid(title):
     """Try to find a Wikidata QID for a film title."""
-    q = """
-    SELECT ?film WHERE {
-      ?film wdt:P31 wd:Q11424.
-      ?film rdfs:label "%s"@en.
-    } LIMIT 10
-    """ % title.replace('"', '\\"')
     try:
-        r = requests.get(WIKIDATA_SPARQL, params={"query": q, "format": "json"},
-                         headers={"User-Agent": USER_AGENT}, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        bindings = data.get("results", {}).get("bindings", [])
-        if not bindings:
+        qid = FILM_QID_LOADER.load(title)
+        if not qid:
             # fallback to contains match
             q2 = """
             SELECT ?film ?filmLabel WHERE {
@@ -147,19 +168,16 @@ def wikidata_film_qid(title):
               SERVICE wikibase:label { bd:serviceParam wikibase:language "en". }
             } LIMIT 10
             """ % title.replace('"', '\\"')
-            r2 = requests.get(WIKIDATA_SPARQL, params={"query": q2, "format": "json"},
-                              headers={"User-Agent": USER_AGENT}, timeout=10)
-            r2.raise_for_status()
-            data2 = r2.json()
-            bs = data2.get("results", {}).get("bindings", [])
+            bs = wikidata_query(q2).get("results", {}).get("bindings", [])
             if not bs:
                 return None
             return bs[0]["film"]["value"].split("/")[-1]
-        return bindings[0]["film"]["value"].split("/")[-1]
+        return qid
     except Exception as e:
         print("Wikidata film lookup error:", e)
         return None
 
+@IN_FLIGHT.shared
 def wikidata_check_oscar_win(person_name, film_title=None, year=None):
     """
     Check Wikidata for Academy Award wins for a person (optionally restricted to a film and/or year).
@@ -193,7 +211,7 @@ def wikidata_check_oscar_win(person_name, film_title=None, year=None):
     """
     try:
         r = requests.get(WIKIDATA_SPARQL, params={"query": query, "format": "json"},
-                         headers={"User-Agent": USER_AGENT}, timeout=15)
+                         headers={"User-Agent": USER_AGENT}, timeout=_budget(15))
         r.raise_for_status()
         data = r.json()
         bindings = data.get("results", {}).get("bindings", [])
@@ -293,7 +311,13 @@ CAST_THR = 85
 DIRECTOR_THR = 85
 
 def fuzzy_pick_person(name):
+    local = PERSON_INDEX.best(name, threshold=PERSON_THR)
+    if local:
+        score = int(local["score"])
+        notice = f'Notice: using closest match "{local["name"]}" for input "{name}" (score {score}%).'
+        return {"found": True, "name": local["name"], "id": local["id"], "score": score, "notice": notice}
     candidates = tmdb_search_person(name)
+    PERSON_INDEX.add_tmdb_results(candidates)
     if not candidates:
         return {"found": False, "name": None, "id": None, "score": 0, "notice": ""}
     names = [p.get("name") for p in candidates if p.get("name")]
@@ -326,7 +350,7 @@ def fuzzy_pick_movie(title, year=None):
 # ---------------------------
 # Verification functions
 # ---------------------------
-def verify_actor_in_movie(person_raw, movie_raw):
+def verify_actor_in_movie(person_raw, movie_raw, person_centric=False):
     notices = []
     person_res = fuzzy_pick_person(person_raw)
     if person_res["notice"]:
@@ -334,6 +358,10 @@ def verify_actor_in_movie(person_raw, movie_raw):
     if not person_res["found"]:
         return {"verdict": "Not enough evidence", "explanation": f"No TMDb person found similar to '{person_raw}'", "evidence": [], "notices": notices}
 
+    films = person_filmography(person_res["id"], tmdb_person_movie_credits) if person_centric else None
+    if films is not None:
+        return verify_in_filmography(person_res, movie_raw, films["cast"], "cast", notices, fuzzy_pick_movie)
+
     movie_res = fuzzy_pick_movie(movie_raw)
     if movie_res["notice"]:
         notices.append(movie_res["notice"])
@@ -349,13 +377,21 @@ def verify_actor_in_movie(person_raw, movie_raw):
     if best and best[1] >= CAST_THR:
         matched_name, score = best[0], int(best[1])
         evidence = [f"TMDb movie: /movie/{movie_res['id']}"]
-        return {"verdict": "Supported", "explanation": f"{person_res['name']} appears in cast of {movie_res['title']} (matched {matched_name}, {score}%).", "evidence": evidence, "notices": notices}
+        return {"verdict": "Supported", "explanation": f"{person_res['name']} appears in cast of {movie_res['title']} (matched {matched_name}, {score}%).", "evidence": evidence, "notices": notices,
+                "film": {"id": movie_res["id"], "title": movie_res["title"]}}
     else:
         evidence = [f"TMDb movie: /movie/{movie_res['id']}"]
         return {"verdict": "Refuted", "explanation": f"{person_res['name']} not found in cast of {movie_res['title']} (best cast match: {best}).", "evidence": evidence, "notices": notices}
 
-def verify_director_of_movie(movie_raw, director_raw):
+def verify_director_of_movie(movie_raw, director_raw, person_centric=False):
     notices = []
+    if person_centric:
+        person_res = fuzzy_pick_person(director_raw)
+        films = person_filmography(person_res["id"], tmdb_person_movie_credits) if person_res["found"] else None
+        if films is not None:
+            if person_res["notice"]:
+                notices.append(person_res["notice"])
+            return verify_in_filmography(person_res, movie_raw, films["directed"], "director", notices, fuzzy_pick_movie)
     movie_res = fuzzy_pick_movie(movie_raw)
     if movie_res["notice"]:
         notices.append(movie_res["notice"])
@@ -373,15 +409,23 @@ def verify_director_of_movie(movie_raw, director_raw):
     else:
         return {"verdict": "Refuted", "explanation": f"{director_raw} not listed as director of {details.get('title')}. Best director match: {best}.", "evidence": [f"TMDb movie: /movie/{movie_res['id']}"], "notices": notices}
 
-def verify_won_oscar_for_movie(person_raw, movie_raw, year=None):
+def verify_won_oscar_for_movie(person_raw, movie_raw, year=None, person_centric=False):
     notices = []
     # 1. ensure person appears in the movie
-    actor_check = verify_actor_in_movie(person_raw, movie_raw)
+    actor_check = verify_actor_in_movie(person_raw, movie_raw, person_centric=person_centric)
     if actor_check["verdict"] != "Supported":
         return {"verdict": "Refuted", "explanation": f"Actor check failed: {actor_check['explanation']}", "evidence": actor_check.get("evidence", []), "notices": actor_check.get("notices", [])}
     notices.extend(actor_check.get("notices", []))
 
-    # 2. try OMDb for movie awards
+    # 2. local Academy Award index, matched on the film the actor check resolved (not the raw
+    #    title); a win it can't confirm falls through to OMDb/Wikidata as before
+    film = actor_check.get("film")
+    if film and OSCAR_INDEX.by_person(person_raw):
+        local = OSCAR_INDEX.check_win(person_raw, film=film["title"], year=year)
+        if local["supported"]:
+            return {"verdict": "Supported", "explanation": f"Academy Award index shows a win for {person_raw} for {film['title']} (evidence: {local['evidence']}).", "evidence": local["evidence"], "notices": notices}
+
+    # 3. try OMDb for movie awards
     om = omdb_lookup_title(movie_raw, year)
     if om:
         awards_text = om.get("Awards", "")
@@ -394,7 +438,7 @@ def verify_won_oscar_for_movie(person_raw, movie_raw, year=None):
             # OMDb explicitly does not list Oscars for movie
             # but proceed to check Wikidata in case OMDb is incomplete
             pass
-    # 3. Use Wikidata to check person-level Oscar win for that film/year
+    # 4. Use Wikidata to check person-level Oscar win for that film/year
     wd = wikidata_check_oscar_win(person_raw, film_title=movie_raw, year=year)
     if wd.get("supported"):
         return {"verdict": "Supported", "explanation": f"Wikidata shows Academy Award win for {person_raw} (evidence: {wd.get('evidence')}).", "evidence": wd.get("evidence"), "notices": notices}
@@ -405,6 +449,11 @@ def verify_won_oscar_for_movie(person_raw, movie_raw, year=None):
             "notices": notices}
 
 def verify_won_oscar(person_raw, year=None):
+    if OSCAR_INDEX.by_person(person_raw):
+        local = OSCAR_INDEX.check_win(person_raw, year=year)
+        if local["supported"]:
+            return {"verdict": "Supported", "explanation": f"Academy Award index shows win(s) for {person_raw}.", "evidence": local["evidence"], "notices": []}
+        return {"verdict": "Not enough evidence", "explanation": "No person-level Oscar found in the Academy Award index" + (f" for {year}." if year else "."), "evidence": [], "notices": []}
     # Person-level check: try Wikidata directly
     wd = wikidata_check_oscar_win(person_raw, film_title=None, year=year)
     if wd.get("supported"):
@@ -414,15 +463,17 @@ def verify_won_oscar(person_raw, year=None):
 # ---------------------------
 # Top-level single-claim verifier
 # ---------------------------
-def verify_single_claim(claim_text):
+def verify_single_claim(claim_text, person_centric=()):
+    """`person_centric`: normalized names to check via their filmography (see plan_person_centric)."""
     parsed = parse_claim_text(claim_text)
     ctype = parsed["type"]
+    pc = normalize_title(claim_person(parsed)) in person_centric
     if ctype == "actor_in_movie":
-        return verify_actor_in_movie(parsed["person"], parsed["movie"])
+        return verify_actor_in_movie(parsed["person"], parsed["movie"], person_centric=pc)
     if ctype == "director_of_movie":
-        return verify_director_of_movie(parsed["movie"], parsed["director"])
+        return verify_director_of_movie(parsed["movie"], parsed["director"], person_centric=pc)
     if ctype == "won_oscar_for_movie":
-        return verify_won_oscar_for_movie(parsed["person"], parsed["movie"], year=parsed.get("year"))
+        return verify_won_oscar_for_movie(parsed["person"], parsed["movie"], year=parsed.get("year"), person_centric=pc)
     if ctype == "won_oscar_in_year":
         return {"verdict": "Not enough evidence", "explanation": "Year-specific person award checks are supported via Wikidata; pass with movie context for better accuracy."}
     if ctype == "won_oscar":
@@ -520,14 +571,31 @@ def get_claims(sentence: str):
 # ---------------------------
 # Bulk verifier
 # ---------------------------
-def verify_claims_from_sentence(sentence: str):
+_claim_pool = ThreadPoolExecutor(max_workers=CLAIM_WORKERS, thread_name_prefix="claims")
+
+def verify_claims_from_sentence(sentence: str, deadline=SENTENCE_DEADLINE):
     raw_claims = get_claims(sentence)
+    person_centric = plan_person_centric([parse_claim_text(c) for c in raw_claims])
+    # the pool size bounds concurrent calls per source; results keep the claims' order
+    expires = time.monotonic() + deadline
+    token = _deadline.set(expires)
+    try:
+        futures = [_claim_pool.submit(contextvars.copy_context().run, verify_single_claim, rc, person_centric)
+                   for rc in raw_claims]
+    finally:
+        _deadline.reset(token)
+    wait(futures, timeout=deadline)
     results = []
-    for rc in raw_claims:
-        res = verify_single_claim(rc)
+    for rc, fut in zip(raw_claims, futures):
+        if fut.done():
+            try:
+                res = fut.result()
+            except Exception as e:
+                res = {"verdict": "Not enough evidence", "explanation": f"Verification failed: {e}", "evidence": [], "notices": []}
+        else:
+            fut.cancel()
+            res = {"verdict": "Not enough evidence", "explanation": f"Verification did not finish within {deadline:.0f}s.", "evidence": [], "notices": []}
         results.append({"claim": rc, "result": res})
-        # be polite to APIs
-        time.sleep(0.2)
     return results
 
 # ---------------------------
@@ -12,6 +12,14 @@ import requests
 import json
 from rapidfuzz import process, fuzz
 
+from metrics import CACHE_LOOKUPS, CLAIM_PARSE
+from payloads import loads
+from title_index import normalize_title
+from tracing import traced
+from upstream import robust_get
+from verdict_common import (PERSON_INDEX, OSCAR_INDEX, person_filmography, verify_in_filmography,
+                            claim_person, plan_person_centric, label_qid_loaders)
+
 # ---------------------------
 # CONFIG - replace OMDB if needed
 # ---------------------------
@@ -33,22 +41,6 @@ except Exception:
     # google.genai might not be installed; that's fine
     pass
 
-# ---------------------------
-# Robust GET with retries
-# ---------------------------
-def robust_get(url, params=None, headers=None, timeout=10, retries=3, backoff=0.6):
-    attempt = 0
-    while attempt < retries:
-        try:
-            resp = requests.get(url, params=params or {}, headers=headers or {}, timeout=timeout)
-            resp.raise_for_status()
-            return resp
-        except requests.exceptions.RequestException as e:
-            attempt += 1
-            if attempt >= retries:
-                raise
-            time.sleep(backoff * (2 ** (attempt - 1)))
-
 # ---------------------------
 # TMDb helpers (Bearer token)
 # ---------------------------
@@ -61,9 +53,9 @@ def tmdb_get(path, params=None, timeout=10):
         "User-Agent": USER_AGENT
     }
     try:
-        resp = robust_get(url, params=params or {}, headers=headers, timeout=timeout)
+        resp = robust_get(url, params=params or {}, headers=headers, timeout=timeout, source="tmdb")
         return resp.json()
-    except Exception as e:
+    except requests.exceptions.RequestException as e:  # NotModified must reach the cache revalidating this entry
         print(f"TMDb network error for {url} : {e}")
         return None
 
@@ -92,6 +84,11 @@ def tmdb_movie_credits(movie_id):
         return None
     return tmdb_get(f"/movie/{movie_id}/credits")
 
+def tmdb_person_movie_credits(person_id):
+    if not person_id:
+        return None
+    return tmdb_get(f"/person/{person_id}/movie_credits")
+
 # ---------------------------
 # OMDb helper (fallback)
 # ---------------------------
@@ -116,21 +113,19 @@ def omdb_lookup_title(title, year=None):
 def wikidata_query(query, timeout=15):
     headers = {"User-Agent": USER_AGENT}
     try:
-        resp = robust_get(WIKIDATA_SPARQL, params={"query": query, "format": "json"}, headers=headers, timeout=timeout)
+        resp = robust_get(WIKIDATA_SPARQL, params={"query": query, "format": "json"}, headers=headers, timeout=timeout, source="wikidata")
         return resp.json()
-    except Exception as e:
+    except requests.exceptions.RequestException as e:
         print("Wikidata SPARQL error:", e)
         return None
 
+PERSON_QID_LOADER, FILM_QID_LOADER = label_qid_loaders(wikidata_query)
+
 def wikidata_person_qid(person_name):
-    q = """
-    SELECT ?person WHERE {
-      ?person rdfs:label "%s"@en.
-      ?person wdt:P31 wd:Q5.
-    } LIMIT 5
-    """ % person_name.replace('"', '\\"')
-    data = wikidata_query(q)
-    if not data:
+    try:
+        return PERSON_QID_LOADER.load(person_name)
+    except Exception as e:
+        print("Wikidata person QID error:", e)
         # fallback contains-search
         q2 = """
         SELECT ?person ?personLabel WHERE {
@@ -145,18 +140,12 @@ def wikidata_person_qid(person_name):
             return None
         bs = data2.get("results", {}).get("bindings", [])
         return bs[0]["person"]["value"].split("/")[-1] if bs else None
-    bindings = data.get("results", {}).get("bindings", [])
-    return bindings[0]["person"]["value"].split("/")[-1] if bindings else None
 
 def wikidata_film_qid(title):
-    q = """
-    SELECT ?film WHERE {
-      ?film wdt:P31 wd:Q11424.
-      ?film rdfs:label "%s"@en.
-    } LIMIT 10
-    """ % title.replace('"', '\\"')
-    data = wikidata_query(q)
-    if not data:
+    try:
+        return FILM_QID_LOADER.load(title)
+    except Exception as e:
+        print("Wikidata film QID error:", e)
         q2 = """
         SELECT ?film ?filmLabel WHERE {
           ?film wdt:P31 wd:Q11424.
@@ -170,9 +159,8 @@ def wikidata_film_qid(title):
             return None
         bs = data2.get("results", {}).get("bindings", [])
         return bs[0]["film"]["value"].split("/")[-1] if bs else None
-    bindings = data.get("results", {}).get("bindings", [])
-    return bindings[0]["film"]["value"].split("/")[-1] if bindings else None
 
+@traced()
 def wikidata_check_oscar_win(person_name, film_title=None, year=None):
     person_qid = wikidata_person_qid(person_name)
     if not person_qid:
@@ -373,7 +361,14 @@ CAST_THR = 85
 DIRECTOR_THR = 85
 
 def fuzzy_pick_person(name):
+    local = PERSON_INDEX.best(name, threshold=PERSON_THR)
+    CACHE_LOOKUPS.inc(cache="person_index", result="hit" if local else "miss")
+    if local:
+        score = int(local["score"])
+        notice = f'Notice: using closest match "{local["name"]}" for input "{name}" (score {score}%).'
+        return {"found": True, "name": local["name"], "id": local["id"], "score": score, "notice": notice}
     candidates = tmdb_search_person(name)
+    PERSON_INDEX.add_tmdb_results(candidates)
     if not candidates:
         return {"found": False, "name": None, "id": None, "score": 0, "notice": ""}
     names = [p.get("name") for p in candidates if p.get("name")]
@@ -403,7 +398,7 @@ def fuzzy_pick_movie(title, year=None):
     notice = f'Notice: using closest movie match "{best_title}" for input "{title}" (score {score}%).'
     return {"found": True, "title": best_title, "id": tmdb_id, "score": score, "release_year": release_year, "notice": notice}
 
-def verify_actor_in_movie(person_raw, movie_raw):
+def verify_actor_in_movie(person_raw, movie_raw, person_centric=False):
     notices = []
     person_res = fuzzy_pick_person(person_raw)
     if person_res["notice"]:
@@ -411,6 +406,10 @@ def verify_actor_in_movie(person_raw, movie_raw):
     if not person_res["found"]:
         return {"verdict": "Not enough evidence", "explanation": f"No TMDb person found similar to '{person_raw}'", "evidence": [], "notices": notices}
 
+    films = person_filmography(person_res["id"], tmdb_person_movie_credits) if person_centric else None
+    if films is not None:
+        return verify_in_filmography(person_res, movie_raw, films["cast"], "cast", notices, fuzzy_pick_movie)
+
     movie_res = fuzzy_pick_movie(movie_raw)
     if movie_res["notice"]:
         notices.append(movie_res["notice"])
@@ -426,13 +425,21 @@ def verify_actor_in_movie(person_raw, movie_raw):
     if best and best[1] >= CAST_THR:
         matched_name, score = best[0], int(best[1])
         evidence = [f"TMDb movie: /movie/{movie_res['id']}"]
-        return {"verdict": "Supported", "explanation": f"{person_res['name']} appears in cast of {movie_res['title']} (matched {matched_name}, {score}%).", "evidence": evidence, "notices": notices}
+        return {"verdict": "Supported", "explanation": f"{person_res['name']} appears in cast of {movie_res['title']} (matched {matched_name}, {score}%).", "evidence": evidence, "notices": notices,
+                "film": {"id": movie_res["id"], "title": movie_res["title"]}}
     else:
         evidence = [f"TMDb movie: /movie/{movie_res['id']}"]
         return {"verdict": "Refuted", "explanation": f"{person_res['name']} not found in cast of {movie_res['title']} (best cast match: {best}).", "evidence": evidence, "notices": notices}
 
-def verify_director_of_movie(movie_raw, director_raw):
+def verify_director_of_movie(movie_raw, director_raw, person_centric=False):
     notices = []
+    if person_centric:
+        person_res = fuzzy_pick_person(director_raw)
+        films = person_filmography(person_res["id"], tmdb_person_movie_credits) if person_res["found"] else None
+        if films is not None:
+            if person_res["notice"]:
+                notices.append(person_res["notice"])
+            return verify_in_filmography(person_res, movie_raw, films["directed"], "director", notices, fuzzy_pick_movie)
     movie_res = fuzzy_pick_movie(movie_raw)
     if movie_res["notice"]:
         notices.append(movie_res["notice"])
@@ -450,15 +457,23 @@ def verify_director_of_movie(movie_raw, director_raw):
     else:
         return {"verdict": "Refuted", "explanation": f"{director_raw} not listed as director of {details.get('title')}. Best director match: {best}.", "evidence": [f"TMDb movie: /movie/{movie_res['id']}"], "notices": notices}
 
-def verify_won_oscar_for_movie(person_raw, movie_raw, year=None):
+def verify_won_oscar_for_movie(person_raw, movie_raw, year=None, person_centric=False):
     notices = []
     # 1. ensure person appears in the movie
-    actor_check = verify_actor_in_movie(person_raw, movie_raw)
+    actor_check = verify_actor_in_movie(person_raw, movie_raw, person_centric=person_centric)
     if actor_check["verdict"] != "Supported":
         return {"verdict": "Refuted", "explanation": f"Actor check failed: {actor_check['explanation']}", "evidence": actor_check.get("evidence", []), "notices": actor_check.get("notices", [])}
     notices.extend(actor_check.get("notices", []))
 
-    # 2. try OMDb for movie awards
+    # 2. local Academy Award index, matched on the film the actor check resolved (not the raw
+    #    title); a win it can't confirm falls through to OMDb/Wikidata as before
+    film = actor_check.get("film")
+    if film and OSCAR_INDEX.by_person(person_raw):
+        local = OSCAR_INDEX.check_win(person_raw, film=film["title"], year=year)
+        if local["supported"]:
+            return {"verdict": "Supported", "explanation": f"Academy Award index shows a win for {person_raw} for {film['title']} (evidence: {local['evidence']}).", "evidence": local["evidence"], "notices": notices}
+
+    # 3. try OMDb for movie awards
     om = omdb_lookup_title(movie_raw, year)
     if om:
         awards_text = om.get("Awards", "")
@@ -471,7 +486,7 @@ def verify_won_oscar_for_movie(person_raw, movie_raw, year=None):
             # OMDb explicitly does not list Oscars for movie
             # but proceed to check Wikidata in case OMDb is incomplete
             pass
-    # 3. Use Wikidata to check person-level Oscar win for that film/year
+    # 4. Use Wikidata to check person-level Oscar win for that film/year
     wd = wikidata_check_oscar_win(person_raw, film_title=movie_raw, year=year)
     if wd.get("supported"):
         return {"verdict": "Supported", "explanation": f"Wikidata shows Academy Award win for {person_raw} (evidence: {wd.get('evidence')}).", "evidence": wd.get("evidence"), "notices": notices}
@@ -482,6 +497,11 @@ def verify_won_oscar_for_movie(person_raw, movie_raw, year=None):
             "notices": notices}
 
 def verify_won_oscar(person_raw, year=None):
+    if OSCAR_INDEX.by_person(person_raw):
+        local = OSCAR_INDEX.check_win(person_raw, year=year)
+        if local["supported"]:
+            return {"verdict": "Supported", "explanation": f"Academy Award index shows win(s) for {person_raw}.", "evidence": local["evidence"], "notices": []}
+        return {"verdict": "Not enough evidence", "explanation": "No person-level Oscar found in the Academy Award index" + (f" for {year}." if year else "."), "evidence": [], "notices": []}
     # Person-level check: try Wikidata directly
     wd = wikidata_check_oscar_win(person_raw, film_title=None, year=year)
     if wd.get("supported"):
@@ -491,15 +511,18 @@ def verify_won_oscar(person_raw, year=None):
 # ---------------------------
 # Top-level single-claim verifier
 # ---------------------------
-def verify_single_claim(claim_text):
+@traced("claim")
+def verify_single_claim(claim_text, person_centric=()):
+    """`person_centric`: normalized names to check via their filmography (see plan_person_centric)."""
     parsed = parse_claim_text(claim_text)
     ctype = parsed["type"]
+    pc = normalize_title(claim_person(parsed)) in person_centric
     if ctype == "actor_in_movie":
-        return verify_actor_in_movie(parsed["person"], parsed["movie"])
+        return verify_actor_in_movie(parsed["person"], parsed["movie"], person_centric=pc)
     if ctype == "director_of_movie":
-        return verify_director_of_movie(parsed["movie"], parsed["director"])
+        return verify_director_of_movie(parsed["movie"], parsed["director"], person_centric=pc)
     if ctype == "won_oscar_for_movie":
-        return verify_won_oscar_for_movie(parsed["person"], parsed["movie"], year=parsed.get("year"))
+        return verify_won_oscar_for_movie(parsed["person"], parsed["movie"], year=parsed.get("year"), person_centric=pc)
     if ctype == "won_oscar_in_year":
         return {"verdict": "Not enough evidence", "explanation": "Year-specific person award checks are supported via Wikidata; pass with movie context for better accuracy."}
     if ctype == "won_oscar":
@@ -591,6 +614,63 @@ def extract_claims_with_gemini(sentence: str):
     lines = [l.strip() for l in text.splitlines() if l.strip()]
     return lines
 
+# Structured output: typed claims constrained by a response schema, rendered into the canonical
+# sentences parse_claim_text understands, so no line cleanup or repair pass is needed.
+CLAIM_TYPES = ["actor_in_movie", "director_of_movie", "won_oscar_for_movie", "won_oscar_in_year", "won_oscar"]
+CLAIM_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "type": {"type": "STRING", "enum": CLAIM_TYPES},
+            "person": {"type": "STRING", "description": "actor, director or award winner"},
+            "movie": {"type": "STRING"},
+            "year": {"type": "INTEGER"},
+        },
+        "required": ["type", "person"],
+    },
+}
+
+def render_claim(c):
+    person, movie, year = c.get("person"), c.get("movie"), c.get("year")
+    if not isinstance(person, str) or not person.strip():
+        return None
+    ctype = c.get("type")
+    if ctype == "actor_in_movie" and movie:
+        return f"{person} acted in {movie}"
+    if ctype == "director_of_movie" and movie:
+        return f"{movie} was directed by {person}"
+    if ctype == "won_oscar_for_movie" and movie:
+        return f"{person} won an Oscar for {movie}" + (f" in {year}" if year else "")
+    if ctype == "won_oscar_in_year" and year:
+        return f"{person} won an Oscar in {year}"
+    if ctype == "won_oscar":
+        return f"{person} won an Oscar"
+    return None
+
+def extract_typed_claims_with_gemini(sentence: str):
+    if not GEMINI_AVAILABLE:
+        raise RuntimeError("Gemini not available in this environment.")
+    prompt = f"""
+    You are a fact extraction assistant.
+    Break the following sentence into independent factual claims about movies:
+    "{sentence}"
+    """
+    resp = genai_client.models.generate_content(
+        model="gemini-2.5-flash", contents=prompt,
+        config={"response_mime_type": "application/json", "response_schema": CLAIM_SCHEMA})
+    try:
+        items = loads(resp.text)
+        if not isinstance(items, list):
+            raise ValueError(f"expected a JSON array of claims, got {type(items).__name__}")
+    except (ValueError, TypeError):
+        CLAIM_PARSE.inc(mode="schema", result="failed")
+        raise
+    rendered = [render_claim(c) for c in items if isinstance(c, dict)]
+    claims = list(dict.fromkeys(r for r in rendered if r))
+    CLAIM_PARSE.inc(mode="schema", result="ok" if len(rendered) == len(items) and all(rendered) else "invalid_items")
+    return claims
+
 def extract_claims_fallback(sentence: str):
     if "\n" in sentence or "*" in sentence or "-" in sentence:
         lines = [l.strip() for l in re.split(r'[\n\r]+', sentence) if l.strip()]
@@ -599,23 +679,29 @@ def extract_claims_fallback(sentence: str):
     return parts
 
 def get_claims(sentence: str, autofill_subject=True):
+    def prose(lines):
+        return normalize_extracted_claims(postprocess_gemini_lines(lines, autofill_subject=autofill_subject))
+
     if GEMINI_AVAILABLE and genai_client:
+        try:
+            # an empty list is an answer (no checkable claims), not a reason to ask again in free text
+            return extract_typed_claims_with_gemini(sentence)
+        except Exception as e:
+            print("Structured Gemini extraction failed, falling back to free text:", e)
         try:
             raw_lines = extract_claims_with_gemini(sentence)
-            cleaned = postprocess_gemini_lines(raw_lines, autofill_subject=autofill_subject)
+            cleaned = prose(raw_lines)
+            CLAIM_PARSE.inc(mode="prose", result="ok" if cleaned == raw_lines else "repaired")
             # If Gemini returned a single long line, try fallback sentence split
             if len(cleaned) == 1 and len(raw_lines) == 1:
                 # split the single line on sentence boundaries and re-process
-                parts = extract_claims_fallback(raw_lines[0])
-                return postprocess_gemini_lines(parts, autofill_subject=autofill_subject)
+                return prose(extract_claims_fallback(raw_lines[0]))
             return cleaned
         except Exception as e:
             print("Gemini extraction failed, falling back:", e)
-            raw_lines = extract_claims_fallback(sentence)
-            return postprocess_gemini_lines(raw_lines, autofill_subject=autofill_subject)
+            return prose(extract_claims_fallback(sentence))
     else:
-        raw_lines = extract_claims_fallback(sentence)
-        return postprocess_gemini_lines(raw_lines, autofill_subject=autofill_subject)
+        return prose(extract_claims_fallback(sentence))
 
 # ---------------------------
 # (Re-use verification functions from earlier implementation)
@@ -635,15 +721,15 @@ if __name__ == "__main__":
     print("Input sentence:", test_sentence)
     print("\nExtracting granular claims...")
     claims = get_claims(test_sentence, autofill_subject=True)
-    claims = normalize_extracted_claims(claims)
     for i, c in enumerate(claims, 1):
         print(f"{i}. {c}")
 
     # If verify_single_claim is defined in your script, run verification now:
     try:
         results = []
+        person_centric = plan_person_centric([parse_claim_text(c) for c in claims])
         for c in claims:
-            res = verify_single_claim(c)   # assume function exists in the full script
+            res = verify_single_claim(c, person_centric=person_centric)   # assume function exists in the full script
             results.append({"claim": c, "result": res})
             time.sleep(0.2)
         print("\nVerification results:")
@@ -0,0 +1,130 @@
+"""
+Shared pieces of the claim verifiers (verdict.py, verdict2.py)
+- The local person and Academy Award indexes, loaded once from PERSON_INDEX_PATH /
+  OSCAR_INDEX_PATH.
+- Person filmographies: one /movie_credits call answers every "X acted in / directed Y"
+  claim for X (`person_filmography`, `verify_in_filmography`).
+- Wikidata label -> QID loaders: exact-label lookups from concurrent claims are coalesced
+  into one VALUES query per short window (`label_qid_loaders`).
+- The lookup planner that decides which people to verify person-centric.
+"""
+
+import os
+from collections import Counter
+
+from batching import BatchLoader
+from cache import LookupCache
+from oscar_index import OscarIndex
+from person_index import PersonIndex
+from title_index import normalize_title
+
+# Local person index: resolves names to TMDb person IDs without a /search/person round trip.
+# Seeded from PERSON_INDEX_PATH (see person_index.py) and grown from live search results.
+PERSON_INDEX = PersonIndex()
+if os.environ.get("PERSON_INDEX_PATH"):
+    print(f"Loaded {PERSON_INDEX.load_jsonl(os.environ['PERSON_INDEX_PATH'])} people into the local index")
+
+# Local Academy Award index (see oscar_index.py): wins it records are confirmed without OMDb or
+# SPARQL; anything else still goes through them. Reloaded every OSCAR_INDEX_REFRESH seconds if the export changes.
+OSCAR_INDEX = OscarIndex()
+if os.environ.get("OSCAR_INDEX_PATH"):
+    print(f"Loaded {OSCAR_INDEX.load_jsonl(os.environ['OSCAR_INDEX_PATH'])} Academy Award records into the local index")
+    OSCAR_INDEX.start_auto_refresh(os.environ["OSCAR_INDEX_PATH"], int(os.environ.get("OSCAR_INDEX_REFRESH", "3600")))
+
+# ---------------------------
+# Person filmographies
+# ---------------------------
+FILMOGRAPHY_CACHE = LookupCache("person_filmography")
+
+def _fetch_filmography(person_id, fetch_credits):
+    data = fetch_credits(person_id)
+    if data is None:
+        raise RuntimeError(f"no movie_credits for TMDb person {person_id}")
+    def films(entries):
+        return {m["id"]: {"id": m["id"], "title": m["title"], "year": (m.get("release_date") or "")[:4] or None}
+                for m in entries if m.get("id") and m.get("title")}
+    return {"cast": films(data.get("cast", [])),
+            "directed": films(c for c in data.get("crew", []) if c.get("job") == "Director")}
+
+def person_filmography(person_id, fetch_credits):
+    """
+    {"cast": {movie_id: film}, "directed": {movie_id: film}} for a TMDb person, or None on failure.
+    `fetch_credits(person_id)` returns the raw /person/{id}/movie_credits JSON (None on error).
+    """
+    try:
+        return FILMOGRAPHY_CACHE.get_or_fetch(person_id, lambda: _fetch_filmography(person_id, fetch_credits))
+    except Exception as e:
+        print("TMDb filmography error:", e)
+        return None
+
+def verify_in_filmography(person_res, movie_raw, films, role, notices, pick_movie):
+    """
+    Set lookup in a person's filmography. Only an exact (normalized) title counts as found
+    there; anything else is resolved with `pick_movie` and checked by TMDb ID, so a near miss
+    like "Iron Man 4" never matches "Iron Man 2".
+    """
+    evidence = [f"TMDb person: /person/{person_res['id']}/movie_credits"]
+    wanted = normalize_title(movie_raw)
+    film = next((f for f in films.values() if normalize_title(f["title"]) == wanted), None)
+    if film is not None:
+        return {"verdict": "Supported", "explanation": f"{person_res['name']} is credited as {role} on {film['title']} ({film['year']}).", "evidence": evidence, "notices": notices,
+                "film": {"id": film["id"], "title": film["title"]}}
+    movie_res = pick_movie(movie_raw)
+    if movie_res["notice"]:
+        notices.append(movie_res["notice"])
+    if not movie_res["found"]:
+        return {"verdict": "Not enough evidence", "explanation": f"No TMDb movie found similar to '{movie_raw}'", "evidence": [], "notices": notices}
+    if movie_res["id"] in films:
+        return {"verdict": "Supported", "explanation": f"{person_res['name']} is credited as {role} on {movie_res['title']}.", "evidence": evidence, "notices": notices,
+                "film": {"id": movie_res["id"], "title": movie_res["title"]}}
+    return {"verdict": "Refuted", "explanation": f"{movie_res['title']} is not in {person_res['name']}'s TMDb credits as {role}.", "evidence": evidence + [f"TMDb movie: /movie/{movie_res['id']}"], "notices": notices}
+
+# ---------------------------
+# Wikidata label -> QID
+# ---------------------------
+def _batch_label_qids(labels, class_qid, run_query):
+    values = " ".join('"%s"@en' % l.replace('"', '\\"') for l in labels)
+    q = """
+    SELECT ?label ?item WHERE {
+      VALUES ?label { %s }
+      ?item rdfs:label ?label.
+      ?item wdt:P31 wd:%s.
+    }
+    """ % (values, class_qid)
+    data = run_query(q)
+    if not data:
+        raise RuntimeError("Wikidata batched QID query failed")
+    qids = {}
+    for b in data.get("results", {}).get("bindings", []):
+        qids.setdefault(b["label"]["value"], b["item"]["value"].split("/")[-1])
+    return qids
+
+def label_qid_loaders(run_query):
+    """
+    (person, film) BatchLoaders resolving exact English labels to QIDs (None if no match).
+    Wikidata throttles on query count, not size. `run_query(sparql)` is the verifier's own
+    transport and returns the JSON results (None or raise on failure).
+    """
+    return (BatchLoader("wikidata_person_qid", lambda names: _batch_label_qids(names, "Q5", run_query)),
+            BatchLoader("wikidata_film_qid", lambda titles: _batch_label_qids(titles, "Q11424", run_query)))
+
+# ---------------------------
+# Lookup planner
+# ---------------------------
+def claim_person(parsed):
+    return parsed.get("director") if parsed["type"] == "director_of_movie" else parsed.get("person")
+
+def plan_person_centric(parsed_claims):
+    """
+    Pick who to verify person-centric: people paired with more distinct films than any of
+    those films recurs, e.g. one actor across three films -> fetch that actor's credits once;
+    one film with three cast claims -> stay film-centric. Takes parse_claim_text results.
+    """
+    pairs = set()
+    for parsed in parsed_claims:
+        person = claim_person(parsed)
+        if parsed["type"] in ("actor_in_movie", "director_of_movie", "won_oscar_for_movie") and person and parsed.get("movie"):
+            pairs.add((normalize_title(person), normalize_title(parsed["movie"])))
+    per_person = Counter(p for p, _ in pairs)
+    per_movie = Counter(m for _, m in pairs)
+    return {p for p, n in per_person.items() if n >= 2 and all(n > per_movie[m] for pp, m in pairs if pp == p)}